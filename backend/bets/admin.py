@@ -1,6 +1,6 @@
 # backend/bets/admin.py
 from django.contrib import admin
-from .models import Round, Bet
+from .models import Round, Bet, SettlementJob
 
 @admin.register(Round)
 class RoundAdmin(admin.ModelAdmin):
@@ -13,3 +13,20 @@ class BetAdmin(admin.ModelAdmin):
     list_display = ("user", "round", "selection", "stake", "status", "payout", "net", "created_at")
     search_fields = ("user__username", "round__round_id")
     list_filter = ("status", "selection")
+
+@admin.register(SettlementJob)
+class SettlementJobAdmin(admin.ModelAdmin):
+    list_display = ("bet", "due_at", "attempts", "locked_until", "last_error")
+    list_filter = ("attempts",)
+    actions = ("retry_jobs", "refund_job_bets")
+
+    @admin.action(description="Retry selected jobs (reset attempts)")
+    def retry_jobs(self, request, queryset):
+        n = queryset.update(attempts=0, locked_until=None, last_error="")
+        self.message_user(request, f"{n} job(s) queued again.")
+
+    @admin.action(description="Refund bets of selected jobs")
+    def refund_job_bets(self, request, queryset):
+        from .settlement import refund_jobs
+        n = refund_jobs(queryset)
+        self.message_user(request, f"{n} bet(s) refunded.")
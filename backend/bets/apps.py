@@ -7,12 +7,21 @@ class BetsConfig(AppConfig):
     name = "bets"
 
     def ready(self):
-        serve_contexts = {"runserver", "gunicorn", "uvicorn"}
+        # every serving process runs the engine: one takes the leader lease,
+        # the others follow (daphne is how the ASGI workers are deployed)
+        serve_contexts = {"runserver", "daphne", "gunicorn", "uvicorn"}
         cmd = " ".join(sys.argv)
         if not any(c in cmd for c in serve_contexts):
             return
         if "runserver" in cmd and os.environ.get("RUN_MAIN") != "true":
             return
-        from .engine import start_engine
+        from .engine import is_leader, start_engine
+        from .settlement import release_dead_jobs, start_workers
         start_engine()
+        if is_leader():
+            try:
+                release_dead_jobs()
+            except Exception as e:
+                print(f"[credit:dead ] sweep failed: {e}")
+        start_workers()
         print("[engine] background engine started (single)")
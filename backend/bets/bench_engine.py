@@ -0,0 +1,240 @@
+"""
+Engine micro-benchmarks.
+
+    python bets/bench_engine.py rounds [--threads 8] [--seconds 3]
+    python bets/bench_engine.py contention [--threads 8] [--seconds 3]
+    python bets/bench_engine.py fanout [--sizes 1000,10000,50000]
+
+rounds: current_state() throughput/latency under N reader threads, engine
+mode (shared dict behind the global _LOCK) vs derived mode (pure HMAC
+derivation, lock-free). No DB access.
+
+contention: round reads (current_round / place_bet) while a writer keeps
+taking _LOCK the way rollovers do (held for WRITE_HOLD_MS, simulating the
+Round insert + TableState store). "before" reads under _LOCK as the views
+used to; "after" is current_state() on the published snapshot. No DB access.
+
+fanout: one round_update group_send to N members, until every member has
+its text frame: wall time and process CPU per message. "per-consumer" is
+the old message (payload dict, json-encoded by each consumer's send_json),
+"pre-encoded" is the engine's text frame forwarded as-is. Run on both
+channel layers (pglayer's local-member path; its NOTIFY side carries one
+message either way). Members are drained straight from their queues: the
+in-memory receive() sweeps every channel for expiry on each call, which
+would swamp the numbers at 10k+. No DB access.
+"""
+import os
+import sys
+import argparse
+import asyncio
+import bisect
+import json
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'betting_app.settings')
+
+import django
+django.setup()
+
+from bets import engine
+
+
+def _run_readers(read, threads: int, seconds: float, stats: bool = False):
+    """
+    Hammer read(now, table_id) from N threads; return (ops/s, p50 µs, p99 µs),
+    plus p99.9 µs and the share of reads slower than 100 µs when `stats`.
+    """
+    tables = list(engine.TABLES)
+    samples = [[] for _ in range(threads)]
+    stop = time.perf_counter() + seconds
+
+    def worker(out):
+        i = 0
+        clock = time.perf_counter
+        while clock() < stop:
+            t0 = clock()
+            read(int(time.time()), tables[i % len(tables)])
+            out.append(clock() - t0)
+            i += 1
+
+    pool = [threading.Thread(target=worker, args=(samples[n],)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    lat = sorted(s for chunk in samples for s in chunk)
+    p50 = lat[len(lat) // 2] * 1e6
+    p99 = lat[int(len(lat) * 0.99)] * 1e6
+    if stats:
+        p999 = lat[int(len(lat) * 0.999)] * 1e6
+        slow = (len(lat) - bisect.bisect_right(lat, 100e-6)) / len(lat)
+        return len(lat) / seconds, p50, p99, p999, slow
+    return len(lat) / seconds, p50, p99
+
+
+def bench_rounds(threads: int, seconds: float):
+    now = int(time.time())
+    # engine mode: prime each table's dict so reads never touch the DB
+    for table in engine.TABLES.values():
+        table.state = engine.new_round_state(table.grid_start(now), table.table_id)
+
+    def locked_read(ts, table_id):
+        with engine._LOCK:
+            return engine.TABLES[table_id].state
+
+    def derived_read(ts, table_id):
+        table = engine.TABLES[table_id]
+        return engine.derive_round_state(table_id, engine.round_index(table, ts))
+
+    print(f"current_state, {threads} thread(s), {seconds}s each, tables={','.join(engine.TABLES)}")
+    for name, read in (("locked global", locked_read), ("derived", derived_read)):
+        ops, p50, p99 = _run_readers(read, threads, seconds)
+        print(f"  {name:<14} {ops:>12,.0f} ops/s   p50 {p50:7.2f} µs   p99 {p99:7.2f} µs")
+
+    # cold derivation cost (cache miss: one HMAC + two table lookups)
+    n = 20000
+    t0 = time.perf_counter()
+    for k in range(n):
+        engine._derive.__wrapped__(engine.DEFAULT_TABLE_ID, k)
+    print(f"  uncached derive: {(time.perf_counter() - t0) / n * 1e6:.2f} µs/round")
+
+
+WRITE_HOLD_MS = 1.0      # _LOCK hold per simulated rollover write
+WRITE_EVERY_MS = 5.0     # gap between writes (many tables / follower reloads)
+
+
+def bench_contention(threads: int, seconds: float):
+    if engine.DERIVED_ROUNDS:
+        print("contention: derived mode never locks on reads; run with TEENPATTI_ROUND_MODE=engine")
+        return
+    engine._ROLE = "leader"   # serve published snapshots, never reload from the store
+    now = int(time.time())
+    for table in engine.TABLES.values():
+        with engine._LOCK:
+            engine._publish(table, engine.new_round_state(table.grid_start(now), table.table_id))
+
+    def locked_read(ts, table_id):
+        with engine._LOCK:
+            state = engine.current_state(ts, table_id)
+            return engine.phase_of(state, ts)
+
+    def snapshot_read(ts, table_id):
+        state = engine.current_state(ts, table_id)
+        return engine.phase_of(state, ts)
+
+    print(
+        f"round reads, {threads} reader(s) + 1 writer holding _LOCK {WRITE_HOLD_MS}ms "
+        f"every {WRITE_EVERY_MS}ms, {seconds}s each"
+    )
+    for name, read in (("before (_LOCK)", locked_read), ("after (snapshot)", snapshot_read)):
+        stop = threading.Event()
+
+        def writer():
+            tables = list(engine.TABLES.values())
+            i = 0
+            while not stop.is_set():
+                table = tables[i % len(tables)]
+                with engine._LOCK:
+                    started = engine.new_round_state(table.grid_start(int(time.time())), table.table_id)
+                    time.sleep(WRITE_HOLD_MS / 1000)
+                    engine._publish(table, started)
+                i += 1
+                time.sleep(WRITE_EVERY_MS / 1000)
+
+        w = threading.Thread(target=writer, daemon=True)
+        w.start()
+        ops, p50, p99, p999, slow = _run_readers(read, threads, seconds, stats=True)
+        stop.set()
+        w.join()
+        print(
+            f"  {name:<17} {ops:>12,.0f} ops/s   p50 {p50:8.2f} µs   "
+            f"p99 {p99:8.2f} µs   p99.9 {p999:9.2f} µs   >100µs {slow:.3%}"
+        )
+
+
+def _fanout_layers():
+    from channels.layers import InMemoryChannelLayer
+    from betting_app.pglayer import PostgresChannelLayer
+
+    def memory_receive(layer, channel):
+        return layer.channels[channel].get_nowait()[1]
+
+    def pg_receive(layer, channel):
+        return layer._inboxes[channel].queue.get_nowait()
+
+    def make_pg():
+        pg = PostgresChannelLayer(capacity=10)
+        pg._start = lambda: None                  # local delivery only
+        pg._publish = lambda *args: None
+        return pg
+
+    return (
+        ("in-memory", lambda: InMemoryChannelLayer(capacity=10), memory_receive),
+        ("pglayer", make_pg, pg_receive),
+    )
+
+
+async def _fanout_once(layer, receive, channels, message, forward) -> tuple:
+    wall, cpu = time.perf_counter(), time.process_time()
+    await layer.group_send("bench", message)
+    for channel in channels:
+        forward(receive(layer, channel))
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def bench_fanout(threads: int, seconds: float, sizes=(1000, 10000, 50000)):
+    now = int(time.time())
+    table = engine.TABLES[engine.DEFAULT_TABLE_ID]
+    state = engine.new_round_state(table.grid_start(now), table.table_id)
+    data = engine.round_payload(state, state["start_time"] + engine.BET_SECONDS + 9)  # full reveal
+    data["event"] = "reveal_step"
+
+    frames = []
+    variants = (
+        ("per-consumer", lambda: {"type": "round_update", "data": data},
+         lambda event: frames.append(json.dumps({"type": "round_update", **event["data"]}))),
+        ("pre-encoded", lambda: {"type": "round_update", "text": engine.encode_round_update(data)},
+         lambda event: frames.append(event["text"])),
+    )
+    print(f"round_update fan-out, {len(engine.encode_round_update(data))} byte frame, per message")
+    for layer_name, make_layer, receive in _fanout_layers():
+        for n in sizes:
+            layer = make_layer()
+            channels = [asyncio.run(layer.new_channel()) for _ in range(n)]
+
+            async def join():
+                for channel in channels:
+                    await layer.group_add("bench", channel)
+            asyncio.run(join())
+
+            reps = max(3, 30000 // n)
+            for name, build, forward in variants:
+                async def run():
+                    return [await _fanout_once(layer, receive, channels, build(), forward) for _ in range(reps)]
+                results = asyncio.run(run())
+                frames.clear()
+                wall = sorted(r[0] for r in results)[len(results) // 2] * 1e3
+                cpu = sorted(r[1] for r in results)[len(results) // 2] * 1e3
+                print(f"  {layer_name:<9} {n:>6} members  {name:<12}  wall {wall:8.1f} ms   cpu {cpu:8.1f} ms")
+
+
+SUITES = {
+    "rounds": bench_rounds,
+    "contention": bench_contention,
+    "fanout": bench_fanout,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suite", choices=sorted(SUITES))
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="fanout: member counts")
+    args = parser.parse_args()
+    if args.suite == "fanout":
+        bench_fanout(args.threads, args.seconds, [int(n) for n in args.sizes.split(",")])
+    else:
+        SUITES[args.suite](args.threads, args.seconds)
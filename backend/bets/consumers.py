@@ -1,18 +1,16 @@
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
 from users.models import User
-from .models import Bet
-from .engine import CURRENT_ROUND
-from django.db.models import Sum
-from decimal import Decimal
+from . import services
+from .engine import current_state, encode_round_update, get_table, round_payload, user_exposure
+from urllib.parse import parse_qs
+import time
 
 
 def _compute_profile_snapshot(user_id: int):
     """
-    Return current balance and open exposure for the user's current round.
+    Return current balance and open exposure in the tables' current rounds.
     """
-    global CURRENT_ROUND
-    current_round_id = CURRENT_ROUND["round_id"] if CURRENT_ROUND else None
     try:
         u = User.objects.get(id=user_id)
     except User.DoesNotExist:
@@ -21,14 +19,7 @@ def _compute_profile_snapshot(user_id: int):
     if u.is_superuser:
         return {"balance": "∞", "expo": "∞", "is_admin": True}
 
-    expo = (
-        Bet.objects.filter(
-            user_id=user_id,
-            status="PLACED",
-            round__round_id=str(current_round_id) if current_round_id else None,
-        ).aggregate(total=Sum("stake"))["total"]
-        or Decimal("0.00")
-    )
+    expo = user_exposure(user_id)
     return {"balance": f"{u.balance:.2f}", "expo": f"{expo:.2f}", "is_admin": False}
 
 
@@ -55,8 +46,32 @@ class UserProfileConsumer(AsyncJsonWebsocketConsumer):
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def receive_json(self, content, **kwargs):
-        # Optional: ping/pong or commands from client
-        pass
+        """
+        Client commands:
+          {"type": "place_bet", "request_id": ..., "round_id", "player", "amount",
+           "bet_seconds_left"?, "table_id"?}
+            → {"type": "bet_ack", "request_id": ..., "ok": true, "balance", ...}
+            or {"type": "bet_ack", "request_id": ..., "ok": false, "error", "status"}
+        """
+        if not isinstance(content, dict):
+            return
+        if content.get("type") == "place_bet":
+            await self._place_bet(content)
+
+    async def _place_bet(self, content):
+        ack = {"type": "bet_ack", "request_id": content.get("request_id")}
+        try:
+            # not thread-sensitive: intake blocks until its batch commits, and
+            # concurrent bets must be able to land in the same batch
+            result = await database_sync_to_async(services.place_bet, thread_sensitive=False)(
+                self.scope["user"], content
+            )
+            await self.send_json({**ack, "ok": True, **result})
+        except services.BetError as e:
+            await self.send_json({**ack, "ok": False, "error": str(e), "status": e.status})
+        except Exception as e:
+            print(f"[place-bet:ws] ERROR: {e}")
+            await self.send_json({**ack, "ok": False, "error": "Bet could not be placed", "status": 500})
 
     async def profile_update(self, event):
         """
@@ -81,20 +96,54 @@ class UserProfileConsumer(AsyncJsonWebsocketConsumer):
 
 
 class RoundConsumer(AsyncJsonWebsocketConsumer):
-    group_name = "rounds"
+    """
+    Live round ticks for one table (?table=<id>, default table if omitted).
+    The engine pushes one message to the table's group per phase change /
+    reveal step, so viewers never poll /current-round/:
+      - "round_update": full payload (on connect, on {"type": "resync"},
+        at each new round, and whenever there is no previous tick to diff)
+      - "round_delta": changes since seq "base" (see engine.encode_round_delta)
+    """
 
     async def connect(self):
         user = self.scope.get("user")
         if not user or not user.is_authenticated:
             await self.close(code=4401)
             return
+        qs = parse_qs((self.scope.get("query_string") or b"").decode())
+        table = get_table((qs.get("table") or [None])[0])
+        if table is None:
+            await self.close(code=4404)
+            return
+        self.table_id = table.table_id
+        self.group_name = table.group
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
+        # Initial snapshot so the table paints without an HTTP round-trip
+        await self._send_snapshot()
+
+    async def _send_snapshot(self):
+        now = int(time.time())
+        # a follower without a fresh copy reads TableState (ORM): not on the loop
+        state = await database_sync_to_async(current_state)(now, self.table_id)
+        if state is None:
+            return  # no round published yet: the round_start push is the first frame
+        payload = round_payload(state, now)
+        await self.send(text_data=encode_round_update({"event": "snapshot", **payload}))
+
     async def disconnect(self, code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def receive_json(self, content, **kwargs):
-        pass
+        # client missed a delta (seq gap): start it over from a full payload
+        if isinstance(content, dict) and content.get("type") == "resync":
+            await self._send_snapshot()
+
     async def round_update(self, event):
-        await self.send_json({"type": "round_update", **event["data"]})
\ No newline at end of file
+        # the engine sends the frame pre-encoded ("text"); "data" is still accepted
+        if "text" in event:
+            await self.send(text_data=event["text"])
+        else:
+            await self.send_json({"type": "round_update", **event["data"]})
\ No newline at end of file
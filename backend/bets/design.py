@@ -5,7 +5,8 @@ This file must NOT define any Django models to avoid conflicts.
 """
 
 import random
-from collections import Counter
+
+from . import handrank
 
 # ============================================================
 # Standard deck + Teen Patti evaluation helpers
@@ -61,48 +62,18 @@ def hand_rank(cards):
       3: Color (Flush)
       2: Pair
       1: High Card
+    Served from the precomputed table in handrank.py.
     """
-    vals = [RANK_VALUE[parse_rank(c)] for c in cards]
-    suits = [parse_suit(c) for c in cards]
-    vals_sorted = sorted(vals, reverse=True)
-    cnt = Counter(vals)
-    is_flush = len(set(suits)) == 1
-    seq, seq_tie = is_sequence(vals)
-
-    # Trail
-    if len(cnt) == 1:
-        return (6, [vals_sorted[0]])
-
-    # Pure sequence (straight flush)
-    if is_flush and seq:
-        return (5, seq_tie)
-
-    # Sequence (straight)
-    if seq:
-        return (4, seq_tie)
-
-    # Color (flush)
-    if is_flush:
-        return (3, vals_sorted)
-
-    # Pair
-    if len(cnt) == 2:
-        pair_val = max(cnt, key=lambda k: (cnt[k], k))
-        kicker = max(v for v in vals if v != pair_val)
-        return (2, [pair_val, kicker])
-
-    # High card
-    return (1, vals_sorted)
+    return handrank.decode(handrank.hand_strength(cards))
 
 def compare_hands(a_cards, b_cards):
     """
     Return 'A' or 'B'. If perfectly tied, break ties randomly (engine-friendly).
     """
-    ra = hand_rank(a_cards)
-    rb = hand_rank(b_cards)
-    if ra > rb:
+    diff = handrank.compare(a_cards, b_cards)
+    if diff > 0:
         return "A"
-    if rb > ra:
+    if diff < 0:
         return "B"
     # exact tie → random winner for engine consistency
     return random.choice(["A", "B"])
@@ -1,19 +1,28 @@
 # backend/bets/engine.py
 
 from __future__ import annotations
-import random, threading, time
-from typing import List, Optional, Tuple
+import asyncio, hashlib, hmac, json, queue, random, threading, time
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 from datetime import datetime
 from decimal import Decimal
 
-from django.db import transaction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
 from django.utils import timezone
-from django.db.models import Sum  # ✅ for expo aggregation
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Round as DbRound
 
-from channels.layers import get_channel_layer  # ✅ WS broadcast
+from channels.layers import InMemoryChannelLayer, get_channel_layer  # ✅ WS broadcast
 from asgiref.sync import async_to_sync         # ✅ WS broadcast
 
-from .models import Round, Bet
+from .models import Round, Bet, TableState
+from .handrank import DECK_SIZE, card_label, compare as compare_hands, encode_cards as _encode_cards
+from . import exposure
+from .leader import EngineLease
+from .scheduler import DeadlineScheduler
 from users.models import User
 # from ledger.models import Transaction  # not used for game settlement anymore
 
@@ -25,9 +34,25 @@ FLIPPED = "flipped_card"
 BET_SECONDS = 20
 REVEAL_SECONDS = 10
 CYCLE_SECONDS = BET_SECONDS + REVEAL_SECONDS
-CURRENT_ROUND: Optional[dict] = None
+ROUNDS_GROUP = "rounds"  # WS group prefix; each table broadcasts to rounds_<table_id>
 _ENGINE_STARTED = False
 
+# Exactly one process per deployment deals and settles ("leader"); the
+# others serve round state published in TableState ("follower").
+_LEASE = EngineLease()
+_ROLE: Optional[str] = None  # None until start_engine(): "leader" | "follower"
+LEADER_GRACE_SECONDS = 2.0   # follower waits this long for a rollover before trying to take over
+FOLLOW_RETRY_SECONDS = 0.05
+
+_SCHEDULER = DeadlineScheduler(name="engine-thread")
+_SETTLE_QUEUE: "queue.Queue[Tuple[dict, int]]" = queue.Queue()
+# DB work of rollovers (lease check, Round insert, TableState upsert, follower
+# reads) runs on its own thread so a slow database never delays a deadline
+_IO_QUEUE: "queue.Queue[Tuple[Callable, tuple]]" = queue.Queue()
+PREPARE_AHEAD_SECONDS = 5  # the leader deals and opens the next round this early
+_PREPARED: Dict[str, Tuple[int, dict]] = {}  # table_id -> (round it follows, next round)
+_LISTENERS: List[Callable[[dict], None]] = []
+
 # ─────────────────────────────────────────────
 # Time helpers
 # ─────────────────────────────────────────────
@@ -40,77 +65,120 @@ def ts_to_dt(ts: int):
 def now_dt():
     return timezone.now()
 
+# ─────────────────────────────────────────────
+# Tables (several T20 tables share one scheduler + settlement worker)
+# ─────────────────────────────────────────────
+class Table:
+    """
+    One Teen Patti T20 table: its own round state, cycle offset and WS group.
+    Rounds start on the grid offset + k*CYCLE_SECONDS, so staggered offsets
+    spread rollovers/settlements of different tables over the cycle.
+
+    `state` is an immutable snapshot (see freeze_state). Writers build the
+    next round completely, then replace the reference under _LOCK; readers
+    just load the attribute and never take the lock.
+    """
+    def __init__(self, table_id: str, offset: int):
+        self.table_id = table_id
+        self.offset = offset % CYCLE_SECONDS
+        self.group = f"{ROUNDS_GROUP}_{table_id}"
+        self.state: Optional[Mapping] = None
+
+    def grid_start(self, now: int) -> int:
+        """Start time of the round that is live at `now` on this table's grid."""
+        return now - ((now - self.offset) % CYCLE_SECONDS)
+
+    def __repr__(self) -> str:
+        return f"Table({self.table_id!r}, offset={self.offset})"
+
+def _build_tables() -> Dict[str, Table]:
+    ids = [str(t).strip() for t in getattr(settings, "TEENPATTI_TABLES", ["1"]) if str(t).strip()]
+    ids = ids or ["1"]
+    return {tid: Table(tid, i * CYCLE_SECONDS // len(ids)) for i, tid in enumerate(ids)}
+
+TABLES: Dict[str, Table] = _build_tables()
+DEFAULT_TABLE_ID = next(iter(TABLES))
+
+def get_table(table_id=None) -> Optional[Table]:
+    """Table by id (None/"" → default table); None if unknown."""
+    if table_id in (None, ""):
+        table_id = DEFAULT_TABLE_ID
+    return TABLES.get(str(table_id))
+
 # ─────────────────────────────────────────────
 # Cards / ranking logic
 # ─────────────────────────────────────────────
-def _new_card() -> str:
-    ranks = ["2","3","4","5","6","7","8","9","10","J","Q","K","A"]
-    suits = ["Hearts","Diamonds","Clubs","Spades"]
-    return f"{random.choice(ranks)} of {random.choice(suits)}"
+# Engine state always holds 0..51 ints (see handrank); CARD_ENCODING only
+# decides how cards are rendered into Round rows and onto the wire.
+CARD_ENCODING = getattr(settings, "TEENPATTI_CARD_ENCODING", "label")
+
+def _new_card() -> int:
+    return random.randrange(DECK_SIZE)
 
-def _deal_hand() -> List[str]:
+def _deal_hand() -> List[int]:
     return [_new_card(), _new_card(), _new_card()]
 
-def pretty(cards: List[str]) -> str:
-    return ", ".join(cards)
-
-def _compare_teen_patti(a: List[str], b: List[str]) -> str:
-    ranks = ["2","3","4","5","6","7","8","9","10","J","Q","K","A"]
-    rval = {r: i + 2 for i, r in enumerate(ranks)}
-
-    def pr(c): return c.split(" of ")[0]
-    def ps(c): return c.split(" of ")[1]
-
-    def is_seq(vals):
-        v = sorted(vals)
-        if len(set(v)) != 3:
-            return False, []
-        # A-2-3 case
-        if v == [2, 3, 14]:
-            return True, [3, 2, 1]
-        ok = v[0] + 1 == v[1] and v[1] + 1 == v[2]
-        return ok, sorted(vals, reverse=True)
-
-    def score(cards):
-        vals = [rval[pr(c)] for c in cards]
-        suits = [ps(c) for c in cards]
-        sv = sorted(vals, reverse=True)
-        counts = {}
-        for v in vals:
-            counts[v] = counts.get(v, 0) + 1
-        flush = len(set(suits)) == 1
-        seq, seq_tie = is_seq(vals)
-        if len(counts) == 1:
-            return (6, [sv[0]])         # trail
-        if flush and seq:
-            return (5, seq_tie)         # pure sequence
-        if seq:
-            return (4, seq_tie)         # sequence
-        if flush:
-            return (3, sv)              # flush
-        if len(counts) == 2:            # pair
-            pair = sorted(counts, key=lambda k: (counts[k], k), reverse=True)[0]
-            kicker = max(v for v in vals if v != pair)
-            return (2, [pair, kicker])
-        return (1, sv)                   # high card
-
-    sa, sb = score(a), score(b)
-    if sa[0] != sb[0]:
-        return "A" if sa[0] > sb[0] else "B"
-    tA, tB = sa[1], sb[1]
-    for i in range(max(len(tA), len(tB))):
-        va = tA[i] if i < len(tA) else 0
-        vb = tB[i] if i < len(tB) else 0
-        if va != vb:
-            return "A" if va > vb else "B"
+def encode_cards(cards: Optional[List[int]]) -> Optional[list]:
+    return _encode_cards(cards, CARD_ENCODING)
+
+def pretty(cards: List[int]) -> str:
+    return ", ".join(card_label(c) for c in cards)
+
+def _compare_teen_patti(a: List[int], b: List[int]) -> str:
+    """Two table lookups (see handrank); exact ties go to a coin flip."""
+    diff = compare_hands(a, b)
+    if diff:
+        return "A" if diff > 0 else "B"
     return random.choice(["A", "B"])
 
+# ─────────────────────────────────────────────
+# Derived rounds (TEENPATTI_ROUND_MODE = "derived")
+# ─────────────────────────────────────────────
+# Round k of a table is a pure function of (table_id, k) and a server secret,
+# so every worker computes the same round without a lock, a store or IPC.
+# k counts cycles on the table's grid: k = (now - offset) // CYCLE_SECONDS.
+ROUND_MODE = getattr(settings, "TEENPATTI_ROUND_MODE", "engine")
+DERIVED_ROUNDS = ROUND_MODE == "derived"
+_ROUND_SECRET = str(getattr(settings, "TEENPATTI_ROUND_SECRET", "") or "").encode()
+if DERIVED_ROUNDS and not _ROUND_SECRET:
+    # anyone holding the secret can compute every future round's cards
+    raise ImproperlyConfigured("TEENPATTI_ROUND_MODE=derived needs TEENPATTI_ROUND_SECRET to be set")
+
+def round_index(table: Table, now: int) -> int:
+    return (int(now) - table.offset) // CYCLE_SECONDS
+
+@lru_cache(maxsize=1024)
+def _derive(table_id: str, index: int) -> tuple:
+    digest = hmac.new(_ROUND_SECRET, f"tpt20:{table_id}:{index}".encode(), hashlib.sha256).digest()
+    # six 16-bit draws mod 52 (bias < 0.1%), dealt with replacement like _deal_hand
+    cards = [int.from_bytes(digest[2 * i:2 * i + 2], "big") % DECK_SIZE for i in range(6)]
+    a, b = tuple(cards[:3]), tuple(cards[3:])
+    diff = compare_hands(a, b)
+    winner = ("A" if diff > 0 else "B") if diff else ("A" if digest[12] & 1 else "B")
+    # 16 digits: never collides with the 15-digit random ids of engine mode
+    pos = list(TABLES).index(table_id)
+    rid = 10**15 + pos * 10**12 + index
+    return rid, index * CYCLE_SECONDS + TABLES[table_id].offset, a, b, winner
+
+def derive_round_state(table_id: str, index: int) -> dict:
+    """Round `index` of a table; same result in every process for the same secret."""
+    rid, start, a, b, winner = _derive(table_id, index)
+    return {
+        "round_id": rid,
+        "table_id": table_id,
+        "start_time": start,
+        "player_a_full": list(a),
+        "player_b_full": list(b),
+        "official_result": winner,
+        "skip_engine_feed": False,
+    }
+
 # ─────────────────────────────────────────────
 # Round persistence helpers
 # ─────────────────────────────────────────────
 def _ensure_round_from_engine(engine_obj: dict) -> Round:
     """
-    Ensure a Round row exists for engine's CURRENT_ROUND snapshot.
+    Ensure a Round row exists for an engine round snapshot.
     Non-destructive sync: we only fill missing fields.
     """
     if not engine_obj:
@@ -118,9 +186,10 @@ def _ensure_round_from_engine(engine_obj: dict) -> Round:
     rid = str(engine_obj["round_id"])
     defaults = {
         "game": "tpt20",
+        "table_id": engine_obj.get("table_id", DEFAULT_TABLE_ID),
         "started_at": ts_to_dt(engine_obj["start_time"]) if engine_obj.get("start_time") else None,
-        "player_a_cards": engine_obj.get("player_a_full") or None,
-        "player_b_cards": engine_obj.get("player_b_full") or None,
+        "player_a_cards": encode_cards(engine_obj.get("player_a_full")) or None,
+        "player_b_cards": encode_cards(engine_obj.get("player_b_full")) or None,
     }
     row, _ = Round.objects.get_or_create(round_id=rid, defaults=defaults)
     changed = False
@@ -134,6 +203,38 @@ def _ensure_round_from_engine(engine_obj: dict) -> Round:
         row.save(update_fields=["started_at", "player_a_cards", "player_b_cards"])
     return row
 
+# Round.pk per live round_id in this process. The leader fills it when it
+# opens a round; other processes resolve it once on their first bet.
+_ROUND_PKS: Dict[int, int] = {}
+
+def _open_round(state: dict) -> dict:
+    """
+    Leader, at rollover: insert the Round row once and cache its pk in the
+    state so the bet path never has to get_or_create it. Best-effort: if the
+    DB is unavailable the round still starts and round_pk_for() catches up.
+    """
+    try:
+        state["round_pk"] = _ensure_round_from_engine(state).pk
+        _ROUND_PKS[state["round_id"]] = state["round_pk"]
+    except Exception as e:
+        print(f"[engine] could not open round {state['round_id']}: {e}")
+    return state
+
+def round_pk_for(state: Mapping) -> int:
+    """Round.pk for a live round state (no query once the round is open)."""
+    pk = state.get("round_pk") or _ROUND_PKS.get(state["round_id"])
+    if pk is None:
+        pk = _ensure_round_from_engine(state).pk
+        _ROUND_PKS[state["round_id"]] = pk
+    return pk
+
+def _forget_round(event: dict):
+    """round_end: drop the finished round's pk cache and exposure book."""
+    if event["kind"] == "round_end":
+        pk = _ROUND_PKS.pop(event["round_id"], None) or event["round"].get("round_pk")
+        if pk is not None:
+            exposure.drop(pk)
+
 def _finalize_round(engine_finished: dict, end_time_ts: int) -> Round:
     """
     Persist engine final to Round: set winner, ended_at, resolver.
@@ -158,45 +259,131 @@ def _finalize_round(engine_finished: dict, end_time_ts: int) -> Round:
 # ─────────────────────────────────────────────
 # Local WS broadcaster (avoid circular import with views)
 # ─────────────────────────────────────────────
-def _broadcast_user_profile(user_id: int):
+def _profile_snapshots(user_ids) -> dict:
     """
-    Compute balance + expo (expo = current round PLACED stakes) and
-    send a 'profile_update' to WS group user_<id>.
+    balance + expo for many users: one balance query, expo from the
+    exposure books of the tables' current rounds (no aggregate).
     """
-    try:
-        u = User.objects.get(id=user_id)
-    except User.DoesNotExist:
+    books = live_books()
+    rows = User.objects.filter(id__in=list(user_ids)).values_list("id", "balance", "is_superuser")
+    out = {}
+    for uid, balance, is_superuser in rows:
+        if is_superuser:
+            out[uid] = {"balance": "∞", "expo": "∞", "is_admin": True}
+        else:
+            expo = sum((b.user(uid) for b in books), exposure.ZERO)
+            out[uid] = {"balance": f"{balance:.2f}", "expo": f"{expo:.2f}", "is_admin": False}
+    return out
+
+def broadcast_user_profiles(user_ids):
+    """
+    Send 'profile_update' to every user_<id> group: one snapshot query for
+    all users, then all group_sends concurrently in a single event-loop hop.
+    """
+    if not user_ids:
         return
+    snapshots = _profile_snapshots(user_ids)
+    channel_layer = get_channel_layer()
 
-    if u.is_superuser:
-        data = {"balance": "∞", "expo": "∞", "is_admin": True}
-    else:
-        global CURRENT_ROUND
-        current_round_id = CURRENT_ROUND["round_id"] if CURRENT_ROUND else None
-        expo_qs = Bet.objects.filter(
-            user_id=user_id,
-            status="PLACED",
-            round__round_id=str(current_round_id) if current_round_id else None,
-        )
-        expo = expo_qs.aggregate(total=Sum("stake"))["total"] or Decimal("0.00")
-        data = {"balance": f"{u.balance:.2f}", "expo": f"{expo:.2f}", "is_admin": False}
+    async def _send_all():
+        await asyncio.gather(*(
+            channel_layer.group_send(f"user_{uid}", {"type": "profile_update", "data": data})
+            for uid, data in snapshots.items()
+        ))
 
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        f"user_{user_id}",
-        {"type": "profile_update", "data": data},
+    async_to_sync(_send_all)()
+
+# Coalesced profile pushes: a bet, its credit and a round settlement close
+# together each used to recompute and send a snapshot. Callers mark users
+# dirty instead; PROFILE_FLUSH_SECONDS after the first mark, one flush sends
+# every dirty user a single fresh snapshot (one balance query for all).
+PROFILE_FLUSH_SECONDS = 0.05
+_DIRTY_PROFILES: set = set()
+_DIRTY_LOCK = threading.Lock()
+_FLUSH_PENDING = False
+_PROFILE_FLUSHER = DeadlineScheduler(name="profile-flush")
+
+def mark_profiles_dirty(user_ids):
+    """Queue a profile_update for these users (sent within PROFILE_FLUSH_SECONDS)."""
+    global _FLUSH_PENDING
+    with _DIRTY_LOCK:
+        _DIRTY_PROFILES.update(user_ids)
+        if _FLUSH_PENDING or not _DIRTY_PROFILES:
+            return
+        _FLUSH_PENDING = True
+    _PROFILE_FLUSHER.start()
+    _PROFILE_FLUSHER.call_later(PROFILE_FLUSH_SECONDS, flush_profiles)
+
+def flush_profiles():
+    """Send the pending profile_updates now (also what the debounce timer runs)."""
+    global _FLUSH_PENDING
+    with _DIRTY_LOCK:
+        user_ids = set(_DIRTY_PROFILES)
+        _DIRTY_PROFILES.clear()
+        _FLUSH_PENDING = False
+    if not user_ids:
+        return
+    close_old_connections()
+    try:
+        broadcast_user_profiles(user_ids)
+    except Exception as e:
+        print(f"[engine] profile flush for {len(user_ids)} user(s) failed: {e}")
+
+# ─────────────────────────────────────────────
+# Shared round store (leader writes, followers read)
+# ─────────────────────────────────────────────
+def freeze_state(state) -> Mapping:
+    """Read-only snapshot of a round state (hands become tuples)."""
+    frozen = dict(state)
+    for key in ("player_a_full", "player_b_full"):
+        if frozen.get(key) is not None:
+            frozen[key] = tuple(frozen[key])
+    return MappingProxyType(frozen)
+
+def _publish(table: "Table", state) -> Mapping:
+    """Swap in a table's next round. Caller holds _LOCK (writers only)."""
+    table.state = freeze_state(state)
+    return table.state
+
+def _store_state(state: dict):
+    TableState.objects.update_or_create(
+        table_id=state["table_id"],
+        defaults={
+            "round_id": state["round_id"],
+            "start_time": state["start_time"],
+            "player_a_full": list(state["player_a_full"]),
+            "player_b_full": list(state["player_b_full"]),
+            "official_result": state["official_result"],
+            "round_pk": state.get("round_pk"),
+        },
+    )
+
+def _load_state(table_id: str) -> Optional[dict]:
+    row = (
+        TableState.objects.filter(table_id=table_id)
+        .values("round_id", "start_time", "player_a_full", "player_b_full", "official_result", "round_pk")
+        .first()
     )
+    if not row:
+        return None
+    return {**row, "table_id": table_id, "skip_engine_feed": False}
+
+def is_leader() -> bool:
+    return _ROLE == "leader"
 
 # ─────────────────────────────────────────────
 # Round lifecycle
 # ─────────────────────────────────────────────
-def new_round_state(now: int) -> dict:
+def new_round_state(now: int, table_id: str = DEFAULT_TABLE_ID) -> dict:
+    if DERIVED_ROUNDS:
+        return derive_round_state(table_id, round_index(TABLES[table_id], now))
     a = _deal_hand()
     b = _deal_hand()
     winner = _compare_teen_patti(a, b)
     rid = random.randint(10**14, 10**15 - 1)
     return {
         "round_id": rid,
+        "table_id": table_id,
         "start_time": now,
         "player_a_full": a,
         "player_b_full": b,
@@ -204,17 +391,94 @@ def new_round_state(now: int) -> dict:
         "skip_engine_feed": False,
     }
 
-def calc_cycle(now: int) -> Tuple[int, str, int]:
-    global CURRENT_ROUND
-    if CURRENT_ROUND is None:
-        CURRENT_ROUND = new_round_state(now)
-    elapsed = now - CURRENT_ROUND["start_time"]
-    sec = elapsed % CYCLE_SECONDS
+def current_state(now: int, table_id=None) -> Optional[Mapping]:
+    """
+    Return a table's live round snapshot (creating the first one if needed).
+    Always read round state through here rather than holding on to it: the
+    snapshot is replaced at every rollover. Raises KeyError for an unknown table.
+    None on a follower while no round has been published for the table yet
+    (leader starting up or failing over): callers show/accept nothing.
+
+    Lock-free: one attribute read of the published snapshot. _LOCK is only
+    taken on the rare slow paths that publish one (first round of a process,
+    follower picking up the leader's next round).
+
+    Followers serve the leader's published round, re-reading TableState only
+    once the cached round has ended (≈ one query per table per round). Until
+    the leader publishes the next one, the ended round is served as is
+    (phase_of reports it as over, so no bets are taken on it).
+    In derived mode the round is computed from `now`: no lock, no store.
+    """
+    table = get_table(table_id)
+    if table is None:
+        raise KeyError(f"unknown table {table_id!r}")
+    if DERIVED_ROUNDS:
+        return derive_round_state(table.table_id, round_index(table, now))
+    state = table.state
+    if state is not None and (_ROLE != "follower" or now < state["start_time"] + CYCLE_SECONDS):
+        return state
+    if _ROLE == "follower":
+        fresh = _load_state(table.table_id)  # outside _LOCK: only the swap is locked
+        with _LOCK:
+            state = table.state
+            if fresh is not None and (state is None or fresh["start_time"] >= state["start_time"]):
+                state = _publish(table, fresh)
+        return state  # never a made-up round: None until the leader publishes
+    with _LOCK:
+        state = table.state
+        if state is None:
+            state = _publish(table, new_round_state(table.grid_start(now), table.table_id))
+        return state
+
+def live_books() -> List["exposure.RoundBook"]:
+    """Exposure books of the round currently live on each table."""
+    now = int(time.time())
+    states = (current_state(now, tid) for tid in TABLES)
+    return [exposure.book(round_pk_for(state)) for state in states if state is not None]
+
+def user_exposure(user_id: int) -> Decimal:
+    """Open stake of a user across the tables' current rounds (no query once warm)."""
+    return sum((b.user(user_id) for b in live_books()), exposure.ZERO)
+
+def round_liability(table_id=None) -> dict:
+    """Open stakes on A/B of a table's live round and the house result per outcome."""
+    state = current_state(int(time.time()), table_id)
+    if state is None:
+        return {
+            "round_id": None,
+            "table_id": get_table(table_id).table_id,
+            **exposure.RoundBook(0).liability(RETURN_RATIO),
+        }
+    return {
+        "round_id": str(state["round_id"]),
+        "table_id": state["table_id"],
+        **exposure.book(round_pk_for(state)).liability(RETURN_RATIO),
+    }
+
+def current_round_ids() -> List[str]:
+    """Public round ids currently live on any table (for expo queries)."""
+    if DERIVED_ROUNDS:
+        now = int(time.time())
+        return [str(_derive(t.table_id, round_index(t, now))[0]) for t in TABLES.values()]
+    return [str(state["round_id"]) for state in (t.state for t in TABLES.values()) if state]
+
+def phase_of(state: Mapping, now: int) -> Tuple[int, str, int]:
+    """
+    (second in cycle, "bet"/"reveal", seconds left in phase) of a round
+    snapshot. A round past its cycle stays at its result (a follower may
+    hold it until the leader publishes the next); it never reopens betting.
+    """
+    sec = now - state["start_time"]
+    if sec >= CYCLE_SECONDS:
+        return CYCLE_SECONDS - 1, "reveal", 0
+    sec = max(sec, 0)
     if sec < BET_SECONDS:
         return sec, "bet", BET_SECONDS - sec
-    else:
-        sec_in_reveal = sec - BET_SECONDS
-        return sec, "reveal", max(0, REVEAL_SECONDS - sec_in_reveal)
+    return sec, "reveal", max(0, REVEAL_SECONDS - (sec - BET_SECONDS))
+
+def calc_cycle(now: int, table_id=None) -> Optional[Tuple[int, str, int]]:
+    state = current_state(now, table_id)
+    return phase_of(state, now) if state is not None else None
 
 def reveal_step(sec_in_cycle: int) -> int:
     if sec_in_cycle < BET_SECONDS:
@@ -223,7 +487,7 @@ def reveal_step(sec_in_cycle: int) -> int:
     step = int((sec_in_reveal / REVEAL_SECONDS) * 6) + 1
     return max(1, min(6, step))
 
-def mask_cards_for_step(full_cards: List[str], step: int, player: str) -> List[str]:
+def mask_cards_for_step(full_cards: list, step: int, player: str) -> list:
     if step <= 0:
         return [FLIPPED, FLIPPED, FLIPPED]
     show = [False, False, False]
@@ -233,115 +497,544 @@ def mask_cards_for_step(full_cards: List[str], step: int, player: str) -> List[s
         show[0] = step >= 2; show[1] = step >= 4; show[2] = step >= 6
     return [full_cards[i] if show[i] else FLIPPED for i in range(3)]
 
+def round_seq(state: Mapping, step: int) -> int:
+    """Position of a round's phase/reveal step on its table; grows with every tick."""
+    return state["start_time"] * 10 + step
+
+def round_payload(state: Mapping, now: int) -> dict:
+    """
+    Public round shape served by /current-round/ and pushed to the table's
+    rounds_<id> WS group. Cards stay masked until their reveal step.
+    """
+    sec, phase, seconds_left = phase_of(state, now)
+    step = reveal_step(sec)
+
+    if phase == "bet":
+        a_cards, b_cards = [FLIPPED] * 3, [FLIPPED] * 3
+        result, a_full, b_full = None, None, None
+    else:
+        a_full, b_full = encode_cards(state["player_a_full"]), encode_cards(state["player_b_full"])
+        a_cards = mask_cards_for_step(a_full, step, "A")
+        b_cards = mask_cards_for_step(b_full, step, "B")
+        result = state["official_result"] if step == 6 else None
+
+    return {
+        "round_id": state["round_id"],
+        "table_id": state.get("table_id", DEFAULT_TABLE_ID),
+        "player_a_cards": a_cards,
+        "player_b_cards": b_cards,
+        "result": result,
+        "phase": phase,
+        "seconds_left": seconds_left,
+        "phase_ends_at": now + seconds_left,
+        "reveal_step": step,
+        "player_a_full": a_full,
+        "player_b_full": b_full,
+        "server_time": now,
+        "seq": round_seq(state, step),
+    }
+
+def encode_round_update(data: dict) -> str:
+    """A round_update WS text frame, encoded once per broadcast (not per socket)."""
+    return json.dumps({"type": "round_update", **data}, separators=(",", ":"))
+
+_CARD_SLOTS = (("player_a_cards", "A"), ("player_b_cards", "B"))
+
+def encode_round_delta(prev: dict, data: dict) -> str:
+    """
+    A round_delta WS text frame: what changed from `prev` (seq "base") to
+    `data`. Top-level fields that differ go in "set", newly shown cards in
+    "cards" as [player, slot, card]. A client holding `base` rebuilds `data`
+    exactly; anyone else asks for a resync (full round_update). Only for
+    ticks within one round: across rounds the full frame is smaller.
+    """
+    changed = {}
+    cards = []
+    for key, value in data.items():
+        if key == "seq" or value == prev.get(key):
+            continue
+        for slots_key, player in _CARD_SLOTS:
+            if key == slots_key and len(value) == len(prev.get(key) or ()):
+                cards += [[player, i, card] for i, (was, card) in enumerate(zip(prev[key], value)) if was != card]
+                break
+        else:
+            changed[key] = value
+    delta = {"type": "round_delta", "seq": data["seq"], "base": prev["seq"], "set": changed}
+    if cards:
+        delta["cards"] = cards
+    return json.dumps(delta, separators=(",", ":"))
+
+# table_id → (etag, body, step_ends_at) of the last rendered /current-round/
+_RENDERED: Dict[str, Tuple[str, bytes, int]] = {}
+_PER_SECOND_FIELDS = ("seconds_left", "server_time")
+
+def step_ends_at(state: Mapping, sec_in_cycle: int) -> int:
+    """Epoch second at which the round's current phase/reveal step ends."""
+    for offset, _, _ in PHASE_SCHEDULE:
+        if offset > sec_in_cycle:
+            return state["start_time"] + offset
+    return state["start_time"] + CYCLE_SECONDS
+
+def rendered_round(now: int, table_id=None) -> Optional[Tuple[bytes, str, int]]:
+    """
+    /current-round/ body as JSON bytes + ETag + step_ends_at. Unlike the WS
+    payload it has no per-second fields: the countdown is phase_ends_at and
+    the next change is step_ends_at (both absolute), so the body only
+    changes with the round, phase and reveal step. It is rendered once per
+    change, and the ETag stays valid until step_ends_at.
+    None while the table has no round yet (see current_state).
+    """
+    state = current_state(now, table_id)
+    if state is None:
+        return None
+    tid = state["table_id"]
+    sec, phase, _ = phase_of(state, now)
+    etag = f'"{tid}-{state["round_id"]}-{phase}-{reveal_step(sec)}"'
+    cached = _RENDERED.get(tid)
+    if cached and cached[0] == etag:
+        return cached[1], etag, cached[2]
+    ends = step_ends_at(state, sec)
+    data = {k: v for k, v in round_payload(state, now).items() if k not in _PER_SECOND_FIELDS}
+    data["step_ends_at"] = ends
+    body = json.dumps(data, separators=(",", ":")).encode()
+    _RENDERED[tid] = (etag, body, ends)
+    return body, etag, ends
+
 # ─────────────────────────────────────────────
 # Round settlement logic (NO ledger Transaction creation)
 # ─────────────────────────────────────────────
+RETURN_RATIO = Decimal("1.96")
+
+def bulk_settle_bets(round_row: Round, bets=None, return_ratio: Decimal = RETURN_RATIO) -> set:
+    """
+    Set-based settlement of PLACED bets for one finished round.
+
+    Statement count is flat in the number of bets:
+      1 lock/select, 1 UPDATE for winners, 1 UPDATE for losers,
+      1 aggregate of payouts, then 1 balance UPDATE per distinct winning user.
+    Math mirrors Bet.settle(): payout = stake*ratio (2dp), net = payout - stake.
+    `bets` narrows the queryset (e.g. a chunk); defaults to the whole round.
+    Returns the set of affected user ids.
+    """
+    winner = round_row.winner
+    now = timezone.now()
+    if bets is None:
+        bets = Bet.objects.filter(round=round_row)
+
+    with transaction.atomic():
+        # lock the open rows first so a concurrent settler can't double-credit
+        locked = list(
+            bets.select_for_update()
+            .filter(status="PLACED")
+            .values_list("id", "user_id", "round_id", "selection", "stake")
+        )
+        if not locked:
+            return set()
+        open_bets = Bet.objects.filter(id__in=[row[0] for row in locked])
+
+        won = open_bets.filter(selection=winner).update(
+            status="WON",
+            payout=DbRound(F("stake") * return_ratio, 2),
+            net=DbRound(F("stake") * (return_ratio - 1), 2),
+            settled_at=now,
+        )
+        lost = open_bets.exclude(selection=winner).update(
+            status="LOST",
+            payout=Decimal("0.00"),
+            net=-F("stake"),
+            settled_at=now,
+        )
+
+        credits = (
+            open_bets.filter(status="WON")
+            .values("user_id")
+            .annotate(total=Sum("payout"))
+        )
+        for row in credits:
+            User.objects.filter(id=row["user_id"]).update(balance=F("balance") + row["total"])
+
+    exposure.settled((bid, rpk, uid, sel, stake) for bid, uid, rpk, sel, stake in locked)
+    print(f"[settle] round {round_row.round_id}: {won} won / {lost} lost, credited {len(credits)} user(s)")
+    return {row[1] for row in locked}
+
 def settle_round(round_row: Round):
     """
     Settle all PLACED bets for this round:
 
-    - Update Bet.status/payout/net/settled_at using Bet.settle()
+    - Bulk-update Bet.status/payout/net/settled_at (see bulk_settle_bets)
     - Credit user.balance ONLY for WON bets (no ledger Transaction rows)
     - Broadcast profile updates for all affected users (winners and losers)
     """
     if not round_row or not round_row.winner:
         return
 
-    winner = round_row.winner
-    now = timezone.now()
-    affected_users = set()
+    affected_users = bulk_settle_bets(round_row)
+
+    # Notify (WS) once we're out of the DB transaction
+    mark_profiles_dirty(affected_users)
 
-    # IMPORTANT: build/select-for-update *inside* the atomic block
+def bulk_refund_bets(bets) -> set:
+    """
+    Cancel PLACED bets and return their stakes (round never got a winner).
+    Same shape as bulk_settle_bets: 1 lock, 1 UPDATE, 1 balance UPDATE per user.
+    """
     with transaction.atomic():
-        bets = (
-            Bet.objects
-            .select_for_update()
-            .select_related("user")   # ↓ avoid refetch per row
-            .filter(round=round_row, status="PLACED")
+        locked = list(
+            bets.select_for_update().filter(status="PLACED")
+            .values_list("id", "user_id", "round_id", "selection", "stake")
         )
+        if not locked:
+            return set()
+        open_bets = Bet.objects.filter(id__in=[row[0] for row in locked])
+        refunds = list(open_bets.values("user_id").annotate(total=Sum("stake")))
+        open_bets.update(status="CANCELLED", payout=F("stake"), net=Decimal("0.00"), settled_at=timezone.now())
+        for row in refunds:
+            User.objects.filter(id=row["user_id"]).update(balance=F("balance") + row["total"])
+    exposure.settled((bid, rpk, uid, sel, stake) for bid, uid, rpk, sel, stake in locked)
+    return {row[1] for row in locked}
+
+# ─────────────────────────────────────────────
+# Crash recovery (leader, at start)
+# ─────────────────────────────────────────────
+RECOVERY_CHUNK = 1000
+RECOVERY_BUDGET_SECONDS = 5.0
+
+def recover_orphaned_bets(budget_seconds: float = RECOVERY_BUDGET_SECONDS, chunk: int = RECOVERY_CHUNK) -> int:
+    """
+    Settle PLACED bets left behind on finished rounds (e.g. the process died
+    before its rollover settled them): rounds that ended, or started more than
+    a cycle ago. Rounds with a winner are settled, rounds without one are
+    refunded. Bets with a SettlementJob are left to the job workers (and, once
+    the job is out of attempts, to settlement.release_dead_jobs).
+
+    Works oldest round first in chunks of `chunk` bets and stops once
+    `budget_seconds` is spent; whatever is left is picked up on the next start.
+    Returns the number of bets resolved.
+    """
+    deadline = time.monotonic() + budget_seconds
+    stale_before = ts_to_dt(int(time.time()) - CYCLE_SECONDS)
+    orphans = Bet.objects.filter(status="PLACED", settlement_job__isnull=True)
+    rounds = (
+        Round.objects.filter(Q(ended_at__isnull=False) | Q(started_at__lt=stale_before))
+        .exclude(round_id__in=current_round_ids())
+        .filter(id__in=orphans.values("round_id"))
+        .order_by("started_at")
+    )
 
-        for bet in bets:
-            user_id = bet.user_id
-            affected_users.add(user_id)
-
-            # compute settlement on the bet row
-            bet.settle(winner=winner, return_ratio=Decimal("1.96"))
-            bet.settled_at = now
-            bet.save(update_fields=["status", "payout", "net", "settled_at"])
-
-            # Credit only winners (keep this block EXACTLY as requested; with visible logs)
-            if bet.status == "WON" and bet.payout > 0:
-                # Lock and fetch user row to avoid race on multiple wins
-                user = (
-                    User.objects
-                    .select_for_update()
-                    .get(id=user_id)
-                )
-                prev_bal = user.balance
-                # REQUIRED exact math + quantize
-                user.balance = (prev_bal + bet.payout).quantize(Decimal("0.01"))
-                user.save(update_fields=["balance"])
-
-                # 🔎 Temporary debug logs (remove later)
-                print(
-                    f"[settle] ✅ {user.username} WON "
-                    f"stake={bet.stake} payout={bet.payout}  {prev_bal} -> {user.balance}"
-                )
+    resolved, rounds_done, users = 0, 0, set()
+    for round_row in rounds.iterator():
+        while time.monotonic() < deadline:
+            ids = list(orphans.filter(round=round_row).values_list("id", flat=True)[:chunk])
+            if not ids:
+                rounds_done += 1
+                break
+            batch = Bet.objects.filter(id__in=ids)
+            if round_row.winner:
+                users |= bulk_settle_bets(round_row, bets=batch)
             else:
-                # 🔎 Temporary debug log for losses / zero-payout
-                try:
-                    uname = bet.user.username  # select_related("user") already in qs
-                except Exception:
-                    uname = f"id={user_id}"
-                print(f"[settle] ❌ {uname} LOST stake={bet.stake}")
+                users |= bulk_refund_bets(batch)
+                print(f"[recovery] round {round_row.round_id}: refunded {len(ids)} bet(s) (no winner)")
+            resolved += len(ids)
+        else:
+            left = rounds.count() - rounds_done
+            print(f"[recovery] time budget spent after {resolved} bet(s); {left} round(s) left for next start")
+            break
 
-    # Notify (WS) once we're out of the DB transaction
-    for uid in affected_users:
-        _broadcast_user_profile(uid)
+    if resolved:
+        print(f"[recovery] resolved {resolved} orphaned bet(s) across {rounds_done} round(s)")
+        mark_profiles_dirty(users)
+    return resolved
 
 # ─────────────────────────────────────────────
-# Engine loop
+# Phase schedule + events
 # ─────────────────────────────────────────────
-def _engine_loop():
-    global CURRENT_ROUND
+def _build_phase_schedule() -> List[Tuple[int, str, int]]:
+    """
+    (offset_in_cycle, phase, reveal_step) for every second where the visible
+    state changes. Derived from calc_cycle/reveal_step so the pushed events
+    and /current-round/ always agree.
+    """
+    out, prev = [], None
+    for sec in range(CYCLE_SECONDS):
+        phase = "bet" if sec < BET_SECONDS else "reveal"
+        key = (phase, reveal_step(sec))
+        if key != prev:
+            out.append((sec, phase, key[1]))
+            prev = key
+    return out
+
+PHASE_SCHEDULE = _build_phase_schedule()
+
+def subscribe(listener: Callable[[dict], None]) -> None:
+    """
+    Register a callback for engine events. Called on the scheduler thread,
+    so it must be quick (queue or fire-and-forget anything slow).
+    Event dict: kind ("round_start" | "reveal_start" | "reveal_step" | "round_end"),
+    table_id, round_id, phase, reveal_step, at (epoch seconds), round (state dict).
+    """
+    if listener not in _LISTENERS:
+        _LISTENERS.append(listener)
+
+def _emit(kind: str, state: dict, phase: str, step: int, at: int):
+    event = {
+        "kind": kind,
+        "table_id": state["table_id"],
+        "round_id": state["round_id"],
+        "phase": phase,
+        "reveal_step": step,
+        "at": at,
+        "round": state,
+    }
+    for listener in list(_LISTENERS):
+        try:
+            listener(event)
+        except Exception as e:
+            print(f"[engine] listener {getattr(listener, '__name__', listener)} failed: {e}")
+
+def _schedule_round(state: dict):
+    """Queue this round's phase boundaries, next-round prep and rollover on the scheduler."""
+    start, tid, rid = state["start_time"], state["table_id"], state["round_id"]
+    now = time.time()
+    for offset, phase, step in PHASE_SCHEDULE[1:]:
+        # a round picked up mid-cycle (engine start) skips boundaries already passed
+        if start + offset + 1 > now:
+            _SCHEDULER.call_at(start + offset, _on_phase_boundary, tid, rid, phase, step, start + offset)
+    end = start + CYCLE_SECONDS
+    _SCHEDULER.call_at(end - PREPARE_AHEAD_SECONDS, _run_io, _prepare_next, tid, rid, end)
+    _SCHEDULER.call_at(end, _rollover, tid, rid)
+
+def _on_phase_boundary(table_id: str, round_id: int, phase: str, step: int, at: int):
+    state = TABLES[table_id].state
+    if not state or state["round_id"] != round_id:
+        return  # stale deadline from a replaced round
+    kind = "reveal_start" if step == 1 else "reveal_step"
+    _emit(kind, state, phase, step, at)
+
+def _run_io(fn: Callable, *args):
+    """Scheduler side: hand DB work to the engine-io thread."""
+    _IO_QUEUE.put((fn, args))
+
+def _io_worker():
     while True:
-        time.sleep(0.5)
-        now = int(time.time())
+        fn, args = _IO_QUEUE.get()
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"[engine] {getattr(fn, '__name__', fn)} failed: {e}")
+        finally:
+            close_old_connections()
 
-        finished = None  # ✅ guard so we only use it if a rollover happened
+def _prepare_next(table_id: str, round_id: int, next_start: int):
+    """
+    engine-io, PREPARE_AHEAD_SECONDS before a rollover: confirm the lease,
+    deal the next round and insert its Round row, so the rollover itself is
+    a swap with no DB work.
+    """
+    global _ROLE
+    if _ROLE == "leader" and not _LEASE.still_held():
+        print("[engine] lost leadership; following the shared round store")
+        _ROLE = "follower"
+    if _ROLE == "follower":
+        if DERIVED_ROUNDS:
+            # every process derives the next round itself; only settlement
+            # needs a leader, so followers just retry the lease once per round
+            _promote()
+        if _ROLE == "follower":
+            return
+    _PREPARED[table_id] = (round_id, _open_round(new_round_state(next_start, table_id)))
 
-        with _LOCK:
-            if CURRENT_ROUND is None:
-                CURRENT_ROUND = new_round_state(now)
-            else:
-                elapsed = now - CURRENT_ROUND["start_time"]
-                if elapsed >= CYCLE_SECONDS:
-                    # snapshot old round and start a new one
-                    finished = {
-                        "round_id": CURRENT_ROUND["round_id"],
-                        "start_time": CURRENT_ROUND["start_time"],
-                        "player_a_full": CURRENT_ROUND["player_a_full"],
-                        "player_b_full": CURRENT_ROUND["player_b_full"],
-                        "official_result": CURRENT_ROUND["official_result"],
-                        "skip_engine_feed": CURRENT_ROUND.get("skip_engine_feed", False),
-                    }
-                    CURRENT_ROUND = new_round_state(now)
-
-        # ✅ Only finalize/settle if we actually rolled over
-        if finished:
-            rid = str(finished["round_id"])
-            try:
-                round_row = _finalize_round(finished, end_time_ts=now)
-                if not finished.get("skip_engine_feed", False):
-                    settle_round(round_row)
-            except Exception as e:
-                print(f"[engine] finalize/settle failed for round {rid}: {e}")
+def _rollover(table_id: str, round_id: int):
+    """Fires exactly at start_time + CYCLE_SECONDS. No DB work here (see _prepare_next)."""
+    if _ROLE == "follower" and not DERIVED_ROUNDS:
+        _run_io(_follow_rollover, table_id, round_id)
+        return
+
+    table = TABLES[table_id]
+    finished = table.state
+    if not finished or finished["round_id"] != round_id:
+        return
+    end_ts = finished["start_time"] + CYCLE_SECONDS
+    # stay on the table's grid even if we fell a whole cycle behind
+    next_start = end_ts if time.time() - end_ts < CYCLE_SECONDS else table.grid_start(int(time.time()))
+    follows, started = _PREPARED.pop(table_id, (None, None))
+    if follows != round_id or started["start_time"] != next_start:
+        # prep missed (engine-io busy, fell behind): deal now, open + store after
+        started = new_round_state(next_start, table_id)
+    with _LOCK:
+        started = _publish(table, started)
+    if _ROLE == "leader":
+        _run_io(_record_round, started)
+    _schedule_round(started)
+    _emit("round_end", finished, "reveal", 6, end_ts)
+    _emit("round_start", started, "bet", 0, started["start_time"])
+
+def _record_round(state: Mapping):
+    """engine-io, leader: make sure the round is open and publish it to followers."""
+    state = dict(state)
+    if state.get("round_pk") is None:
+        _open_round(state)
+    if not DERIVED_ROUNDS:
+        _store_state(state)
+
+def _follow_rollover(table_id: str, round_id: int, waited: float = 0.0):
+    """
+    engine-io, follower side of a rollover: pick up the leader's next round
+    from the store (the swap happens back on the scheduler). If the leader
+    stays silent past the grace period, try to take over.
+    """
+    fresh = _load_state(table_id)
+    if fresh and fresh["round_id"] != round_id:
+        _SCHEDULER.call_later(0, _adopt_followed, table_id, round_id, fresh)
+        return
+    if waited >= LEADER_GRACE_SECONDS and _promote():
+        if round_id is None:
+            # nothing was ever published for this table: start it as leader
+            started = _adopt_or_deal(TABLES[table_id], int(time.time()))
+            _SCHEDULER.call_later(0, _announce_round, started)
+        else:
+            _SCHEDULER.call_later(0, _rollover, table_id, round_id)
+        return
+    _SCHEDULER.call_later(FOLLOW_RETRY_SECONDS, _run_io, _follow_rollover, table_id, round_id, waited + FOLLOW_RETRY_SECONDS)
+
+def _announce_round(state: Mapping):
+    """Scheduler: queue a table's first round and tell listeners it started."""
+    _schedule_round(state)
+    _emit("round_start", state, "bet", 0, state["start_time"])
+
+def _adopt_followed(table_id: str, round_id: int, fresh: dict):
+    """Scheduler: swap in the leader's next round picked up by _follow_rollover."""
+    table = TABLES[table_id]
+    with _LOCK:
+        current = table.state
+        if current and current["start_time"] > fresh["start_time"]:
+            return  # already past it
+        fresh = _publish(table, fresh)
+    # a reader (current_state) may have adopted `fresh` already; its deadlines weren't queued
+    finished = current if current and current["round_id"] == round_id else None
+    _schedule_round(fresh)
+    if finished:
+        _emit("round_end", finished, "reveal", 6, finished["start_time"] + CYCLE_SECONDS)
+    _emit("round_start", fresh, "bet", 0, fresh["start_time"])
+
+def _promote() -> bool:
+    """Try to become leader (e.g. the previous leader process died)."""
+    global _ROLE
+    if not _LEASE.try_acquire():
+        return False
+    _ROLE = "leader"
+    subscribe(_queue_settlement)
+    print("[engine] promoted to leader")
+    return True
+
+def _layer_is_process_local() -> bool:
+    return isinstance(get_channel_layer(), InMemoryChannelLayer)
+
+# table_id → last payload sent to the table's group (the base of the next delta)
+_LAST_BROADCAST: Dict[str, dict] = {}
+
+def _broadcast_round_event(event: dict):
+    """
+    One group_send per phase change / reveal step to the table's viewers.
+    round_end is skipped: step 6 already carried the result and round_start
+    of the next round follows at the same instant.
+    """
+    if event["kind"] == "round_end":
+        return
+    # a shared channel layer already fans the leader's send out to every process
+    if not is_leader() and not _layer_is_process_local():
+        return
+    data = round_payload(event["round"], event["at"])
+    data["event"] = event["kind"]
+    # a tick mostly flips one card: send only the changes since the last
+    # broadcast (viewers joined before it hold that state); full otherwise
+    prev = _LAST_BROADCAST.get(event["table_id"])
+    _LAST_BROADCAST[event["table_id"]] = data
+    text = encode_round_update(data)
+    # a new round changes nearly everything: its delta outweighs the full frame
+    if prev is not None and prev["round_id"] == data["round_id"] and prev["seq"] < data["seq"]:
+        delta = encode_round_delta(prev, data)
+        if len(delta) < len(text):
+            text = delta
+    # ship the frame pre-encoded: consumers forward it as-is, and the layer
+    # copies one short string per member instead of the whole payload dict
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        TABLES[event["table_id"]].group,
+        {"type": "round_update", "text": text},
+    )
+
+def _queue_settlement(event: dict):
+    if event["kind"] == "round_end":
+        _SETTLE_QUEUE.put((dict(event["round"]), event["at"]))
+
+# ─────────────────────────────────────────────
+# Settlement worker (keeps DB work off the scheduler thread)
+# ─────────────────────────────────────────────
+def _settlement_worker():
+    while True:
+        finished, end_ts = _SETTLE_QUEUE.get()
+        rid = str(finished["round_id"])
+        try:
+            round_row = _finalize_round(finished, end_time_ts=end_ts)
+            if not finished.get("skip_engine_feed", False):
+                settle_round(round_row)
+        except Exception as e:
+            print(f"[engine] finalize/settle failed for round {rid}: {e}")
+
+def _adopt_or_deal(table: Table, now: int) -> dict:
+    """New leader: continue a still-live published round, else deal and publish."""
+    stored = _load_state(table.table_id)
+    if stored and now < stored["start_time"] + CYCLE_SECONDS:
+        dealt = stored
+    else:
+        dealt = _open_round(new_round_state(table.grid_start(now), table.table_id))
+        _store_state(dealt)
+    with _LOCK:
+        return _publish(table, dealt)
+
+def _track_derived(table: Table, now: int) -> dict:
+    """Derived mode: keep the live round on the table so rollovers can chain."""
+    state = derive_round_state(table.table_id, round_index(table, now))
+    if _ROLE == "leader":
+        _open_round(state)
+    with _LOCK:
+        return _publish(table, state)
 
 def start_engine():
-    global _ENGINE_STARTED
+    """
+    Start the scheduler in this process. The process holding the engine
+    lease deals, publishes and settles; every other worker follows the
+    shared store and only mirrors phase events locally.
+    """
+    global _ENGINE_STARTED, _ROLE
     if _ENGINE_STARTED:
         print("[engine] background engine started (single)")
         return
     _ENGINE_STARTED = True
-    threading.Thread(target=_engine_loop, name="engine-thread", daemon=True).start()
-    print("[engine] background engine started")
+    now = int(time.time())
+    if _LEASE.try_acquire():
+        _ROLE = "leader"
+        subscribe(_queue_settlement)
+        try:
+            recover_orphaned_bets()
+        except Exception as e:
+            print(f"[recovery] sweep failed: {e}")
+    else:
+        _ROLE = "follower"
+    if DERIVED_ROUNDS:
+        states = [_track_derived(t, now) for t in TABLES.values()]
+    elif _ROLE == "leader":
+        states = [_adopt_or_deal(t, now) for t in TABLES.values()]
+    else:
+        states = [current_state(now, tid) for tid in TABLES]
+    subscribe(_broadcast_round_event)
+    subscribe(_forget_round)
+    for tid, state in zip(TABLES, states):
+        if state is None:  # follower, nothing published yet: wait for the leader
+            _run_io(_follow_rollover, tid, None)
+        else:
+            _schedule_round(state)
+    threading.Thread(target=_settlement_worker, name="engine-settlement", daemon=True).start()
+    threading.Thread(target=_io_worker, name="engine-io", daemon=True).start()
+    _SCHEDULER.start()
+    print(f"[engine] background engine started as {_ROLE}, {ROUND_MODE} rounds ({len(TABLES)} table(s): {', '.join(TABLES)})")
@@ -0,0 +1,144 @@
+# backend/bets/exposure.py
+"""
+In-memory exposure book of the live rounds.
+
+Per round: open stake per user plus the total staked on A and on B. The
+engine reads it for expo (profile, WS snapshots) and round liability, so
+those are dict lookups instead of a Sum("stake") over PLACED bets on every
+call and every broadcast.
+
+A round's book is loaded from the DB (its PLACED bets) the first time this
+process reads it, and reloaded once it is REFRESH_SECONDS old, so bets
+committed by other web workers show up within that. In between it is kept
+current by placed()/settled() (called after the corresponding commit) and
+dropped when the round ends. Both are keyed by bet id, so a bet the load
+already counted is not added again, and a bet settled here is not brought
+back by a load that started before the settlement committed.
+"""
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, Iterable, Set, Tuple
+
+from django.conf import settings
+
+from .models import Bet
+
+ZERO = Decimal("0.00")
+REFRESH_SECONDS = float(getattr(settings, "EXPOSURE_REFRESH_SECONDS", 1.0))
+
+
+class RoundBook:
+    __slots__ = ("round_pk", "bets", "gone", "by_user", "by_side", "fresh_until", "loading")
+
+    def __init__(self, round_pk: int):
+        self.round_pk = round_pk
+        # bet id -> (user_id, selection, stake, seq); seq 0 = came from a load
+        self.bets: Dict[int, Tuple[int, str, Decimal, int]] = {}
+        self.gone: Set[int] = set()     # settled here; a later load must not count them
+        self.by_user: Dict[int, Decimal] = {}
+        self.by_side: Dict[str, Decimal] = {"A": ZERO, "B": ZERO}
+        self.fresh_until = 0.0          # 0 = never loaded
+        self.loading = False
+
+    def add(self, bet_id: int, user_id: int, selection: str, stake: Decimal, seq: int = 0):
+        if bet_id in self.bets or bet_id in self.gone:
+            return
+        self.bets[bet_id] = (user_id, selection, stake, seq)
+        self.by_user[user_id] = self.by_user.get(user_id, ZERO) + stake
+        self.by_side[selection] = self.by_side.get(selection, ZERO) + stake
+
+    def remove(self, bet_id: int):
+        self.gone.add(bet_id)
+        found = self.bets.pop(bet_id, None)
+        if found is None:
+            return
+        user_id, selection, stake, _ = found
+        left = self.by_user.get(user_id, ZERO) - stake
+        if left > 0:
+            self.by_user[user_id] = left
+        else:
+            self.by_user.pop(user_id, None)
+        self.by_side[selection] = max(self.by_side.get(selection, ZERO) - stake, ZERO)
+
+    def user(self, user_id: int) -> Decimal:
+        return self.by_user.get(user_id, ZERO)
+
+    def liability(self, return_ratio: Decimal) -> dict:
+        """What the house pays out / nets for each outcome, given open stakes."""
+        a, b = self.by_side["A"], self.by_side["B"]
+        pays_a, pays_b = (a * return_ratio).quantize(ZERO), (b * return_ratio).quantize(ZERO)
+        return {
+            "stake_a": a,
+            "stake_b": b,
+            "bettors": len(self.by_user),
+            "payout_if_a": pays_a,
+            "payout_if_b": pays_b,
+            "house_net_if_a": a + b - pays_a,
+            "house_net_if_b": a + b - pays_b,
+        }
+
+
+_BOOKS: Dict[int, RoundBook] = {}
+_LOCK = threading.Lock()
+_SEQ = itertools.count(1)   # orders placed() against loads
+
+
+def book(round_pk: int) -> RoundBook:
+    """The round's book; (re)loaded from PLACED bets when missing or stale."""
+    now = time.monotonic()
+    with _LOCK:
+        found = _BOOKS.get(round_pk)
+        if found is None:
+            found = _BOOKS[round_pk] = RoundBook(round_pk)
+        elif found.fresh_until > now or (found.loading and found.fresh_until):
+            return found  # fresh, or stale with a reload already under way
+        found.loading = True
+        mark = next(_SEQ)
+
+    try:
+        rows = list(
+            Bet.objects.filter(round_id=round_pk, status="PLACED")
+            .values_list("id", "user_id", "selection", "stake")
+        )
+    except Exception:
+        with _LOCK:
+            found.loading = False
+        raise
+
+    with _LOCK:
+        loaded = RoundBook(round_pk)
+        loaded.gone = found.gone
+        for bet_id, user_id, selection, stake in rows:
+            loaded.add(bet_id, user_id, selection, stake)
+        # placed() since the query began: committed after its snapshot maybe
+        for bet_id, (user_id, selection, stake, seq) in found.bets.items():
+            if seq > mark:
+                loaded.add(bet_id, user_id, selection, stake, seq)
+        loaded.fresh_until = time.monotonic() + REFRESH_SECONDS
+        if _BOOKS.get(round_pk) is found:  # not dropped meanwhile
+            _BOOKS[round_pk] = loaded
+        return loaded
+
+def placed(bets: Iterable[Tuple[int, int, int, str, Decimal]]):
+    """Committed new bets as (bet_id, round_pk, user_id, selection, stake)."""
+    with _LOCK:
+        for bet_id, round_pk, user_id, selection, stake in bets:
+            found = _BOOKS.get(round_pk)
+            if found is not None:  # no book yet: its first load will include the bet
+                found.add(bet_id, user_id, selection, stake, next(_SEQ))
+
+def settled(bets: Iterable[Tuple[int, int, int, str, Decimal]]):
+    """Committed settlements/refunds as (bet_id, round_pk, user_id, selection, stake)."""
+    with _LOCK:
+        for bet_id, round_pk, _, _, _ in bets:
+            found = _BOOKS.get(round_pk)
+            if found is not None:
+                found.remove(bet_id)
+
+def drop(round_pk: int):
+    with _LOCK:
+        _BOOKS.pop(round_pk, None)
@@ -0,0 +1,149 @@
+# bets/handrank.py
+"""
+Card codec + precomputed Teen Patti hand ranks.
+
+Cards are small ints: code = rank_index * 4 + suit_index (0..51), where
+rank_index 0..12 is 2..A and suit_index follows SUITS. Every ordered
+three-card hand (duplicates included, since the engine deals with
+replacement) maps to one packed strength in a flat 52**3 table, so
+comparing two hands is two array lookups.
+
+Packed strength (higher is better):
+    category << 12 | t0 << 8 | t1 << 4 | t2
+category/tiebreakers match design.hand_rank: 6 Trail, 5 Pure Sequence,
+4 Sequence, 3 Color, 2 Pair, 1 High Card; unused tiebreakers are 0.
+"""
+from __future__ import annotations
+
+from array import array
+from itertools import combinations_with_replacement, permutations
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+RANKS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A")
+SUITS = ("Hearts", "Diamonds", "Clubs", "Spades")
+DECK_SIZE = len(RANKS) * len(SUITS)  # 52
+
+LABELS: Tuple[str, ...] = tuple(f"{r} of {s}" for r in RANKS for s in SUITS)
+LABEL_TO_CODE = {label: code for code, label in enumerate(LABELS)}
+
+# Two-character codes as hinted in Round's model comment: "7H", "JS", "TD" (T = 10)
+SHORT_CODES: Tuple[str, ...] = tuple(r + s for r in "23456789TJQKA" for s in "HDCS")
+SHORT_TO_CODE = {short: code for code, short in enumerate(SHORT_CODES)}
+
+# Wire/storage formats accepted by encode_card(); decoding accepts all of them
+ENCODINGS = ("label", "code", "int")
+
+Card = Union[int, str]
+
+
+# ─────────────────────────────────────────────
+# Encoding helpers
+# ─────────────────────────────────────────────
+def card_code(card: Card) -> int:
+    """'Q of Diamonds' / 'QD' → 41; ints pass through."""
+    if isinstance(card, int):
+        return card
+    code = LABEL_TO_CODE.get(card)
+    if code is None:
+        code = SHORT_TO_CODE[card]
+    return code
+
+def card_label(code: int) -> str:
+    return LABELS[code]
+
+def encode_card(card: Card, encoding: str = "label") -> Card:
+    """Render one card as 'label' ('Q of Diamonds'), 'code' ('QD') or 'int' (41)."""
+    code = card_code(card)
+    if encoding == "int":
+        return code
+    if encoding == "code":
+        return SHORT_CODES[code]
+    return LABELS[code]
+
+def encode_cards(cards: Optional[Sequence[Card]], encoding: str = "label") -> Optional[list]:
+    if cards is None:
+        return None
+    return [encode_card(c, encoding) for c in cards]
+
+def rank_value(code: int) -> int:
+    """2..14 (A=14)"""
+    return code // 4 + 2
+
+
+# ─────────────────────────────────────────────
+# Table build (runs once at import, ~25k evaluations)
+# ─────────────────────────────────────────────
+def _evaluate(c0: int, c1: int, c2: int) -> int:
+    vals = [rank_value(c0), rank_value(c1), rank_value(c2)]
+    sv = sorted(vals, reverse=True)
+    flush = c0 % 4 == c1 % 4 == c2 % 4
+    distinct = len(set(vals))
+
+    seq, seq_tie = False, sv
+    if distinct == 3:
+        if sv == [14, 3, 2]:                        # A-2-3 counts low
+            seq, seq_tie = True, [3, 2, 1]
+        else:
+            seq = sv[0] == sv[1] + 1 == sv[2] + 2
+
+    if distinct == 1:
+        cat, tie = 6, [sv[0]]                       # trail
+    elif flush and seq:
+        cat, tie = 5, seq_tie                       # pure sequence
+    elif seq:
+        cat, tie = 4, seq_tie                       # sequence
+    elif flush:
+        cat, tie = 3, sv                            # color
+    elif distinct == 2:
+        pair = sv[1]                                # middle of sorted is always the pair
+        kicker = sv[0] if sv[0] != pair else sv[2]
+        cat, tie = 2, [pair, kicker]                # pair
+    else:
+        cat, tie = 1, sv                            # high card
+
+    tie = tie + [0] * (3 - len(tie))
+    return cat << 12 | tie[0] << 8 | tie[1] << 4 | tie[2]
+
+def _build_table() -> array:
+    table = array("H", bytes(2 * DECK_SIZE ** 3))
+    for hand in combinations_with_replacement(range(DECK_SIZE), 3):
+        s = _evaluate(*hand)
+        for c0, c1, c2 in set(permutations(hand)):
+            table[(c0 * DECK_SIZE + c1) * DECK_SIZE + c2] = s
+    return table
+
+_TABLE = _build_table()
+
+
+# ─────────────────────────────────────────────
+# Lookups
+# ─────────────────────────────────────────────
+def strength_of(c0: int, c1: int, c2: int) -> int:
+    """Packed strength for three card codes (one array lookup)."""
+    return _TABLE[(c0 * DECK_SIZE + c1) * DECK_SIZE + c2]
+
+def hand_strength(cards: Sequence[Card]) -> int:
+    """Packed strength for a hand given as ints, 'QD' codes or 'R of Suit' labels."""
+    return strength_of(card_code(cards[0]), card_code(cards[1]), card_code(cards[2]))
+
+def compare(a: Sequence[Card], b: Sequence[Card]) -> int:
+    """>0 if A wins, <0 if B wins, 0 on an exact tie."""
+    return hand_strength(a) - hand_strength(b)
+
+def decode(strength: int) -> Tuple[int, List[int]]:
+    """Packed strength → (category, tiebreakers) as returned by design.hand_rank."""
+    tie = [(strength >> 8) & 0xF, (strength >> 4) & 0xF, strength & 0xF]
+    return strength >> 12, [t for t in tie if t]
+
+def strengths(hands: Iterable[Sequence[int]]) -> List[int]:
+    """Bulk variant for simulations/audits over encoded hands."""
+    t, n = _TABLE, DECK_SIZE
+    return [t[(h[0] * n + h[1]) * n + h[2]] for h in hands]
+
+
+__all__ = [
+    "RANKS", "SUITS", "DECK_SIZE", "LABELS", "LABEL_TO_CODE",
+    "SHORT_CODES", "SHORT_TO_CODE", "ENCODINGS",
+    "card_code", "card_label", "rank_value", "encode_card", "encode_cards",
+    "strength_of", "hand_strength", "compare", "decode", "strengths",
+]
@@ -0,0 +1,305 @@
+# backend/bets/intake.py
+"""
+Micro-batched bet intake.
+
+place_bet used to open one transaction per request (debit, refresh, insert).
+In the last seconds of a bet window hundreds of those land together and
+queue on the users/bets rows. Instead, requests hand their bet to submit()
+and wait; one collector thread gathers whatever arrives within
+WINDOW_SECONDS (up to MAX_BATCH) and commits it in one transaction:
+
+  1 SELECT of the batch's balances, 1 of their open-bet fingerprints
+  1 statement (Postgres): a conditional debit per user
+    (UPDATE ... WHERE balance >= total RETURNING balance) chained with
+    the bet and settlement-job INSERTs
+
+Each waiting request then gets its own answer (bet id + balance after its
+debit, or a BetRejected reason). Funds are checked in arrival order, so a
+user's later bets in a batch see the earlier debits.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+
+from . import exposure
+from .engine import mark_profiles_dirty, ts_to_dt
+from .models import Bet, SettlementJob
+from .settlement import schedule_credits, wake_on_commit
+from users.models import User
+
+WINDOW_SECONDS = 0.005
+MAX_BATCH = 500
+
+
+class BetRejected(Exception):
+    """The bet was not taken; str(exc) is the user-facing reason."""
+
+
+class _BalanceChanged(IntegrityError):
+    """Conditional debit matched no row; the batch is retried bet by bet."""
+
+
+class _Pending:
+    __slots__ = ("user_id", "round_pk", "selection", "stake", "delay_seconds",
+                 "done", "bet_id", "balance", "error")
+
+    def __init__(self, user_id: int, round_pk: int, selection: str, stake: Decimal, delay_seconds: int):
+        self.user_id = user_id
+        self.round_pk = round_pk
+        self.selection = selection
+        self.stake = Decimal(stake).quantize(Decimal("0.01"))  # as stored, so fingerprints match
+        self.delay_seconds = delay_seconds
+        self.done = threading.Event()
+        self.bet_id: Optional[int] = None
+        self.balance: Optional[Decimal] = None
+        self.error: Optional[str] = None
+
+    def reset(self):
+        self.bet_id = self.balance = self.error = None
+
+
+_QUEUE: "queue.Queue[_Pending]" = queue.Queue()
+_STARTED = False
+_START_LOCK = threading.Lock()
+
+
+def submit(user_id: int, round_pk: int, selection: str, stake: Decimal, delay_seconds: int) -> Tuple[int, Decimal]:
+    """
+    Debit `stake` and create a PLACED bet (plus its settlement job) in the
+    next intake batch. Blocks until that batch commits.
+    Returns (bet_id, balance after this debit); raises BetRejected.
+    """
+    _start()
+    pending = _Pending(user_id, round_pk, selection, stake, delay_seconds)
+    _QUEUE.put(pending)
+    pending.done.wait()
+    if pending.error:
+        raise BetRejected(pending.error)
+    return pending.bet_id, pending.balance
+
+
+def _start():
+    global _STARTED
+    with _START_LOCK:
+        if _STARTED:
+            return
+        _STARTED = True
+        threading.Thread(target=_collector, name="bet-intake", daemon=True).start()
+
+
+def _collector():
+    while True:
+        batch = [_QUEUE.get()]
+        deadline = time.monotonic() + WINDOW_SECONDS
+        while len(batch) < MAX_BATCH:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            try:
+                batch.append(_QUEUE.get(timeout=left))
+            except queue.Empty:
+                break
+
+        close_old_connections()
+        accepted: List[_Pending] = []
+        try:
+            try:
+                accepted = commit_batch(batch)
+            except Exception as e:
+                print(f"[intake] batch of {len(batch)} failed: {e}")
+                for p in batch:
+                    p.reset()
+                    p.error = "Bet could not be placed"
+            # book before answering (dict updates), so acks' expo include these bets
+            exposure.placed((p.bet_id, p.round_pk, p.user_id, p.selection, p.stake) for p in accepted)
+        except Exception as e:
+            print(f"[intake] exposure update failed: {e}")
+        finally:
+            for p in batch:
+                p.done.set()
+
+        # requests are already answered; profile pushes go out after
+        if accepted:
+            try:
+                mark_profiles_dirty({p.user_id for p in accepted})
+            except Exception as e:
+                print(f"[intake] profile update failed: {e}")
+        close_old_connections()
+
+
+def commit_batch(batch: List[_Pending]) -> List[_Pending]:
+    """
+    Commit a batch in one transaction. If that fails for any reason (a bet
+    from another process took the same fingerprint meanwhile, a deleted
+    round, a dropped connection), redo it one transaction per bet so only
+    the bets that really fail are rejected, each with its own reason.
+    """
+    try:
+        with transaction.atomic():
+            return _apply(batch)
+    except Exception as e:
+        if not isinstance(e, IntegrityError):
+            print(f"[intake] batch of {len(batch)} failed ({e}); retrying bet by bet")
+            close_old_connections()  # drops the connection if the error broke it
+
+    accepted = []
+    for p in batch:
+        p.reset()
+        try:
+            with transaction.atomic():
+                accepted += _apply([p])
+        except _BalanceChanged:
+            p.reset()
+            p.error = "Insufficient balance"
+        except IntegrityError as e:
+            p.reset()
+            p.error = _integrity_reason(e)
+        except Exception as e:
+            print(f"[intake] bet of user {p.user_id} failed: {e}")
+            p.reset()
+            p.error = "Bet could not be placed"
+    return accepted
+
+
+def _integrity_reason(exc: IntegrityError) -> str:
+    """User-facing reason for a constraint violation (unique vs foreign key)."""
+    cause = exc.__cause__
+    code = getattr(cause, "pgcode", None)
+    constraint = getattr(getattr(cause, "diag", None), "constraint_name", None)
+    text = str(exc)
+    if code == "23505" or constraint == "uniq_open_bet_fingerprint" or "UNIQUE constraint" in text:
+        return "Duplicate bet"
+    if code == "23503" or "FOREIGN KEY constraint" in text:
+        return "Round or account no longer exists"
+    print(f"[intake] integrity error: {exc}")
+    return "Bet could not be placed"
+
+
+def _apply(batch: List[_Pending]) -> List[_Pending]:
+    accepted = _plan(batch)
+    if accepted:
+        if connection.vendor == "postgresql":
+            _commit_statement(accepted)
+        else:
+            _commit_orm(accepted)
+    return accepted
+
+
+def _plan(batch: List[_Pending]) -> List[_Pending]:
+    """
+    Decide which bets fit, in arrival order, from one read of balances and
+    open-bet fingerprints. The debit itself stays conditional, so a balance
+    that moves after this read is caught at commit (_BalanceChanged).
+    """
+    uids = {p.user_id for p in batch}
+    balances: Dict[int, Decimal] = dict(User.objects.filter(id__in=uids).values_list("id", "balance"))
+    open_keys = set(
+        Bet.objects.filter(
+            status="PLACED", user_id__in=uids, round_id__in={p.round_pk for p in batch}
+        ).values_list("user_id", "round_id", "selection", "stake")
+    )
+
+    accepted: List[_Pending] = []
+    for p in batch:
+        key = (p.user_id, p.round_pk, p.selection, p.stake)
+        balance = balances.get(p.user_id)
+        if balance is None:
+            p.error = "User not found"
+        elif key in open_keys:
+            p.error = "Duplicate bet"
+        elif balance < p.stake:
+            p.error = "Insufficient balance"
+        else:
+            balances[p.user_id] = p.balance = balance - p.stake
+            open_keys.add(key)
+            accepted.append(p)
+    return accepted
+
+
+# One round trip for the whole batch: conditional debit per user, bet rows
+# only for users whose debit matched, and their settlement jobs.
+_DEBIT_AND_INSERT = """
+WITH req (n, user_id, round_id, selection, stake, due_at) AS (
+    VALUES {values}
+),
+total AS (
+    SELECT user_id, SUM(stake) AS amount FROM req GROUP BY user_id
+),
+debit AS (
+    UPDATE {users} AS u SET balance = u.balance - total.amount
+    FROM total
+    WHERE u.id = total.user_id AND u.balance >= total.amount
+    RETURNING u.id, u.balance
+),
+bet AS (
+    INSERT INTO {bets} (user_id, round_id, selection, stake, status, payout, net, created_at)
+    SELECT req.user_id, req.round_id, req.selection, req.stake, 'PLACED', 0, 0, now()
+    FROM req JOIN debit ON debit.id = req.user_id
+    ORDER BY req.n
+    RETURNING id, user_id, round_id, selection, stake
+),
+job AS (
+    INSERT INTO {jobs} (bet_id, due_at, attempts, last_error, created_at)
+    SELECT bet.id, req.due_at, 0, '', now()
+    FROM bet JOIN req USING (user_id, round_id, selection, stake)
+)
+SELECT bet.id, bet.user_id, bet.round_id, bet.selection, bet.stake, debit.balance
+FROM bet JOIN debit ON debit.id = bet.user_id
+"""
+
+
+def _commit_statement(accepted: List[_Pending]):
+    """
+    Postgres: UPDATE ... WHERE balance >= total RETURNING balance, chained
+    with the bet and job INSERTs in a single statement (fingerprints are
+    unique within a batch, so RETURNING rows map back by fingerprint).
+    """
+    now = int(time.time())
+    params: list = []
+    for n, p in enumerate(accepted):
+        params += [n, p.user_id, p.round_pk, p.selection, p.stake, ts_to_dt(now + int(p.delay_seconds))]
+    sql = _DEBIT_AND_INSERT.format(
+        values=", ".join(["(%s::int, %s::bigint, %s::bigint, %s::varchar, %s::numeric, %s::timestamptz)"] * len(accepted)),
+        users=connection.ops.quote_name(User._meta.db_table),
+        bets=connection.ops.quote_name(Bet._meta.db_table),
+        jobs=connection.ops.quote_name(SettlementJob._meta.db_table),
+    )
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    if len(rows) != len(accepted):
+        raise _BalanceChanged("a balance changed under the batch")
+
+    final = {uid: balance for _, uid, _, _, _, balance in rows}
+    planned_final = {p.user_id: p.balance for p in accepted}   # last bet per user wins
+    by_key = {(uid, rid, sel, stake): bid for bid, uid, rid, sel, stake, _ in rows}
+    for p in accepted:
+        p.bet_id = by_key[(p.user_id, p.round_pk, p.selection, p.stake)]
+        # shift planned balances by anything credited since _plan's read
+        p.balance += final[p.user_id] - planned_final[p.user_id]
+    wake_on_commit(now + int(p.delay_seconds) for p in accepted)
+
+
+def _commit_orm(accepted: List[_Pending]):
+    """Other databases (sqlite in dev): the same steps as separate queries."""
+    totals: Dict[int, Decimal] = defaultdict(Decimal)
+    for p in accepted:
+        totals[p.user_id] += p.stake
+    for uid, total in totals.items():
+        if not User.objects.filter(id=uid, balance__gte=total).update(balance=F("balance") - total):
+            raise _BalanceChanged(f"balance of user {uid} changed under the batch")
+    bets = Bet.objects.bulk_create([
+        Bet(user_id=p.user_id, round_id=p.round_pk, selection=p.selection, stake=p.stake, status="PLACED")
+        for p in accepted
+    ])
+    for p, bet in zip(accepted, bets):
+        p.bet_id = bet.id
+    schedule_credits([(p.bet_id, p.delay_seconds) for p in accepted])
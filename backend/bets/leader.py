@@ -0,0 +1,91 @@
+# backend/bets/leader.py
+"""
+Engine leader election.
+
+Every web worker imports the engine, but only one process per deployment
+may deal cards and settle rounds. The leader holds a session-level Postgres
+advisory lock on a dedicated connection (not Django's per-thread one, which
+may be closed/recycled under us). If the leader dies its session ends,
+Postgres releases the lock and a follower can take over.
+
+On non-Postgres databases (sqlite in dev) there is only one process, so the
+lease is always granted.
+"""
+from __future__ import annotations
+
+import threading
+
+from django.db import connections
+
+# pg advisory lock key: ASCII "tpt20" as an int
+ENGINE_LOCK_KEY = 0x7470743230
+
+
+class EngineLease:
+    def __init__(self, key: int = ENGINE_LOCK_KEY, alias: str = "default"):
+        self.key = key
+        self.alias = alias
+        self._conn = None
+        self._spare = None   # follower's probe connection, reused across attempts
+        self._local = False  # granted without a lock (non-Postgres)
+        self._mutex = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        return self._local or self._conn is not None
+
+    def try_acquire(self) -> bool:
+        """Non-blocking; True if this process is (still) the leader."""
+        with self._mutex:
+            if self._local:
+                return True
+            if self._conn is not None:
+                return self._alive()
+
+            db = connections[self.alias]
+            if db.vendor != "postgresql":
+                self._local = True
+                return True
+
+            conn, self._spare = self._spare, None
+            try:
+                if conn is None:
+                    conn = db.get_new_connection(db.get_connection_params())
+                    conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_try_advisory_lock(%s)", [self.key])
+                    granted = bool(cur.fetchone()[0])
+            except Exception as e:
+                print(f"[leader] lock attempt failed: {e}")
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                return False
+            if granted:
+                self._conn = conn
+            else:
+                self._spare = conn  # followers retry every round: keep the session
+            return granted
+
+    def still_held(self) -> bool:
+        """Cheap liveness check of the lock-holding session."""
+        with self._mutex:
+            if self._local:
+                return True
+            return self._conn is not None and self._alive()
+
+    def _alive(self) -> bool:
+        try:
+            with self._conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception as e:
+            print(f"[leader] lost lock session: {e}")
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+            return False
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0010_bet_round_remove_betrecord_user_delete_roundfeed_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='round',
+            name='table_id',
+            field=models.CharField(default='1', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='round',
+            index=models.Index(fields=['table_id', 'created_at'], name='bets_round_table_i_b8f560_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0011_round_table_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableState',
+            fields=[
+                ('table_id', models.CharField(max_length=16, primary_key=True, serialize=False)),
+                ('round_id', models.BigIntegerField()),
+                ('start_time', models.BigIntegerField()),
+                ('player_a_full', models.JSONField()),
+                ('player_b_full', models.JSONField()),
+                ('official_result', models.CharField(max_length=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
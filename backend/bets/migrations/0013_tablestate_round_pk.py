@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0012_tablestate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tablestate',
+            name='round_pk',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0013_tablestate_round_pk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SettlementJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_at', models.DateTimeField()),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='settlement_job', to='bets.bet')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['due_at'], name='bets_settle_due_at_98947e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Overflow table of the Postgres channel layer (betting_app/pglayer.py):
+# messages too large for a NOTIFY payload are stored here and swept after
+# a minute. Unlogged (nothing in it outlives a crash usefully) and not a
+# model, so it only exists on Postgres.
+
+from django.db import migrations
+
+OVERFLOW_TABLE = "chl_overflow"
+
+
+def create_overflow(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"""
+        CREATE UNLOGGED TABLE IF NOT EXISTS {OVERFLOW_TABLE} (
+            id bigserial PRIMARY KEY,
+            payload text NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+
+
+def drop_overflow(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {OVERFLOW_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0014_settlementjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_overflow, drop_overflow),
+    ]
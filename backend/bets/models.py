@@ -39,6 +39,8 @@ class Round(models.Model):
     # External/user-facing id you already display like 102251013170519
     round_id = models.CharField(max_length=32, unique=True, db_index=True)
     game = models.CharField(max_length=16, choices=GAME_CHOICES, default="tpt20")
+    # Engine table this round ran on (see engine.TABLES)
+    table_id = models.CharField(max_length=16, default="1")
 
     started_at = models.DateTimeField(null=True, blank=True)
     ended_at = models.DateTimeField(null=True, blank=True)
@@ -64,6 +66,7 @@ class Round(models.Model):
         ordering = ("-created_at",)
         indexes = [
             models.Index(fields=("game", "created_at")),
+            models.Index(fields=("table_id", "created_at")),
         ]
 
     def save(self, *args, **kwargs):
@@ -166,3 +169,48 @@ class Bet(models.Model):
 
     def __str__(self) -> str:
         return f"Bet#{self.pk} {self.user} {self.round.round_id} {self.selection} {self.stake} [{self.status}]"
+
+
+# -----------------------------------------------------------------------------
+# TableState = live round of each engine table (shared across workers)
+# -----------------------------------------------------------------------------
+class TableState(models.Model):
+    """
+    Published by the elected engine leader at every rollover so that every
+    web worker serves the same round (see engine.current_state).
+    One row per table; cards are stored as engine ints (0..51).
+    """
+    table_id = models.CharField(max_length=16, primary_key=True)
+    round_id = models.BigIntegerField()
+    start_time = models.BigIntegerField()  # epoch seconds
+    player_a_full = models.JSONField()
+    player_b_full = models.JSONField()
+    official_result = models.CharField(max_length=1)
+    round_pk = models.BigIntegerField(null=True, blank=True)  # Round.pk opened by the leader
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Table {self.table_id} · round {self.round_id}"
+
+
+class SettlementJob(models.Model):
+    """
+    Durable pending credit for one bet (see bets/settlement.py).
+    Inserted with the bet, claimed by settlement workers with
+    SELECT ... FOR UPDATE SKIP LOCKED once due_at has passed, and deleted
+    in the same transaction that credits the bet.
+    """
+    bet = models.OneToOneField(Bet, on_delete=models.CASCADE, related_name="settlement_job")
+    due_at = models.DateTimeField()
+    locked_until = models.DateTimeField(null=True, blank=True)  # visibility timeout of a claim
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=("due_at",)),
+        ]
+
+    def __str__(self) -> str:
+        return f"Job bet={self.bet_id} due={self.due_at:%H:%M:%S} attempts={self.attempts}"
@@ -0,0 +1,84 @@
+# backend/bets/scheduler.py
+"""
+Deadline-driven scheduler used by the round engine.
+
+One daemon thread sleeps on a condition variable until the earliest pending
+deadline and then runs the callback. There is no polling: an idle scheduler
+costs nothing, and a callback fires within a few ms of its deadline.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable
+
+# Log a warning when a callback fires later than this (seconds)
+LATE_WARN_SECONDS = 0.05
+
+
+class DeadlineScheduler:
+    """
+    Min-heap of (deadline, seq, fn, args) served by a single thread.
+    Callbacks must be short; hand slow work (DB settlement) to a worker.
+    """
+
+    def __init__(self, name: str = "engine-scheduler", clock: Callable[[], float] = time.time):
+        self.name = name
+        self.clock = clock
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self.max_lag = 0.0  # worst observed lateness, seconds
+
+    # ─────────────────────────────────────────
+    # Public API
+    # ─────────────────────────────────────────
+    def call_at(self, when: float, fn: Callable, *args) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (when, next(self._seq), fn, args))
+            # wake the thread so it re-computes its sleep against the new head
+            self._cond.notify()
+
+    def call_later(self, delay: float, fn: Callable, *args) -> None:
+        self.call_at(self.clock() + delay, fn, *args)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    # ─────────────────────────────────────────
+    # Internals
+    # ─────────────────────────────────────────
+    def _next_due(self):
+        """Block until the earliest deadline has passed, then pop it."""
+        with self._cond:
+            while True:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] - self.clock()
+                if delay <= 0:
+                    return heapq.heappop(self._heap)
+                self._cond.wait(delay)
+
+    def _run(self) -> None:
+        while True:
+            when, _, fn, args = self._next_due()
+            lag = self.clock() - when
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag > LATE_WARN_SECONDS:
+                print(f"[scheduler] {getattr(fn, '__name__', fn)} fired {lag * 1000:.0f}ms late")
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"[scheduler] {getattr(fn, '__name__', fn)} failed: {e}")
@@ -0,0 +1,123 @@
+# backend/bets/services.py
+"""
+Bet placement shared by the HTTP endpoint (views.place_bet) and the
+profile WebSocket (consumers.UserProfileConsumer "place_bet" command).
+"""
+from __future__ import annotations
+
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+
+from . import intake
+from users import session_cache
+from .engine import REVEAL_SECONDS, current_state, get_table, phase_of, round_pk_for, user_exposure
+
+MIN_STAKE = Decimal("100")
+MAX_STAKE = Decimal("10000")
+
+
+class BetError(Exception):
+    """Rejected bet; str(exc) is the user-facing message, .status the HTTP code."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _to_int(v, default=None):
+    try:
+        return int(v)
+    except Exception:
+        return default
+
+
+def place_bet(user, data) -> dict:
+    """
+    Validate and place one bet for `user`.
+    data: round_id, player ("A"/"B"), amount, optional bet_seconds_left and
+    table_id (default table if omitted).
+    Credit delay = min(client_bet_left, server_bet_left) + 10 (reveal).
+    Returns the acknowledgement dict; raises BetError.
+    """
+    table = get_table(data.get("table_id"))
+    if table is None:
+        raise BetError("Unknown table", status=404)
+    round_id = data.get("round_id")
+    player = data.get("player")
+
+    try:
+        amount = Decimal(str(data.get("amount")))
+    except (InvalidOperation, TypeError):
+        raise BetError("Invalid amount")
+
+    if not round_id or player not in ("A", "B"):
+        raise BetError("Missing fields")
+
+    # a socket outlives its connect-time auth: re-check the (cached,
+    # invalidated on admin edits) account state for every bet
+    info = session_cache.session_info(user.id)
+    if info is None or not info[1]:
+        raise BetError("Account is disabled", status=403)
+
+    now = int(time.time())
+    # one snapshot for both checks, so they always agree on the round
+    state = current_state(now, table.table_id)
+    if state is None:
+        raise BetError("No round is open yet", status=409)
+
+    # avoid cross-round posting
+    if str(state["round_id"]) != str(round_id):
+        raise BetError("Round mismatch")
+
+    sec, phase, server_seconds_left = phase_of(state, now)
+    if phase != "bet":
+        raise BetError("Bet window closed")
+
+    # stake bounds
+    if amount < MIN_STAKE:
+        raise BetError("Bet should be greater than 100")
+    if amount > MAX_STAKE:
+        raise BetError("Bet should be less than 10000")
+
+    # resolve bet-left seconds
+    client_left = _to_int(data.get("bet_seconds_left"), None)
+    if client_left is None or client_left < 0 or client_left > 120:
+        bet_left = server_seconds_left
+        src = "server"
+    else:
+        bet_left = min(max(client_left, 0), server_seconds_left)
+        src = "min(client,server)"
+
+    delay_seconds = max(int(bet_left) + REVEAL_SECONDS, 1)
+
+    # Round row was opened by the engine at rollover
+    round_pk = round_pk_for(state)
+
+    print(
+        f"[deduct:start] t={timezone.now().strftime('%Y-%m-%d %H:%M:%S')}  "
+        f"user={user.username}({user.id}) amount={amount} round={round_id} sel={player} "
+        f"bet_left={bet_left}s(src={src}) reveal={REVEAL_SECONDS}s delay={delay_seconds}s"
+    )
+
+    # debit + PLACED bet + credit job, committed with the other bets of this instant
+    try:
+        bet_id, new_balance = intake.submit(user.id, round_pk, player, amount, delay_seconds)
+    except intake.BetRejected as e:
+        raise BetError(str(e))
+
+    print(
+        f"[deduct:done ] t={timezone.now().strftime('%Y-%m-%d %H:%M:%S')}  "
+        f"user={user.username}({user.id}) bet={bet_id} new_balance={new_balance}"
+    )
+
+    return {
+        "message": f"Bet placed. Stake deducted now; win will be credited after {delay_seconds}s.",
+        "round_id": round_id,
+        "player": player,
+        "bet_amount": str(amount),
+        "delay_seconds": delay_seconds,
+        "balance": f"{new_balance:.2f}",
+        "expo": f"{user_exposure(user.id):.2f}",  # same as /profile/, so clients skip that GET
+    }
@@ -0,0 +1,237 @@
+# backend/bets/settlement.py
+"""
+Deferred bet credits (the "credit after bet_left + reveal" path of place_bet).
+
+Every pending credit is a SettlementJob row written in the same transaction
+as its bet, so a deploy or crash loses nothing. Worker threads claim due
+jobs in batches with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+workers (in any number of processes) never double-claim. A claim hides its
+jobs for VISIBILITY_SECONDS; if the worker dies or the batch fails they
+become claimable again, up to MAX_ATTEMPTS; after that their bets are
+refunded (release_dead_jobs) rather than left PLACED with the stake held.
+
+Workers sleep until the next due second this process knows about (a
+DeadlineScheduler wake-up set by schedule_credit) or POLL_SECONDS, whichever
+comes first, so jobs queued by other processes are still picked up.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from . import exposure
+from .engine import bulk_refund_bets, mark_profiles_dirty, ts_to_dt
+from .models import Bet, Round, SettlementJob
+from .scheduler import DeadlineScheduler
+from users.models import User
+
+PAYOUT_MULTIPLIER = Decimal("2.00")
+
+WORKERS = int(getattr(settings, "TEENPATTI_SETTLEMENT_WORKERS", 1))
+CLAIM_BATCH = 500            # jobs per claim
+VISIBILITY_SECONDS = 30      # a claimed job reappears after this if not completed
+MAX_ATTEMPTS = 5             # then it is dead: release_dead_jobs refunds its bet
+POLL_SECONDS = 1.0
+DEPTH_LOG_SECONDS = 30
+
+_SCHEDULER = DeadlineScheduler(name="settlement-wheel")
+_WAKE = threading.Event()
+_STARTED = False
+_START_LOCK = threading.Lock()
+
+
+# ─────────────────────────────────────────────
+# Producer side
+# ─────────────────────────────────────────────
+def schedule_credit(bet_id: int, delay_seconds: int) -> SettlementJob:
+    """
+    Queue a bet for credit `delay_seconds` from now. Call inside the
+    transaction that creates the bet so both commit (or neither does).
+    """
+    return schedule_credits([(bet_id, delay_seconds)])[0]
+
+def schedule_credits(items: Iterable[Tuple[int, int]]) -> List[SettlementJob]:
+    """Bulk schedule_credit for (bet_id, delay_seconds) pairs: one INSERT."""
+    now = int(time.time())
+    dues = [(bet_id, now + int(delay)) for bet_id, delay in items]
+    jobs = SettlementJob.objects.bulk_create(
+        [SettlementJob(bet_id=bet_id, due_at=ts_to_dt(due)) for bet_id, due in dues]
+    )
+    wake_on_commit(due for _, due in dues)
+    return jobs
+
+def wake_on_commit(dues: Iterable[int]):
+    """Wake the workers at each due second once the current transaction commits."""
+    wake = sorted(set(dues))
+    transaction.on_commit(lambda: [_wake_at(due) for due in wake])
+
+def _wake_at(due: int):
+    start_workers()
+    _SCHEDULER.call_at(due, _WAKE.set)
+
+
+# ─────────────────────────────────────────────
+# Workers
+# ─────────────────────────────────────────────
+def start_workers(count: int = WORKERS):
+    """Start the wake-up scheduler and `count` claim loops (once per process)."""
+    global _STARTED
+    with _START_LOCK:
+        if _STARTED:
+            return
+        _STARTED = True
+        for n in range(max(count, 1)):
+            threading.Thread(target=_worker, name=f"settlement-worker-{n}", daemon=True).start()
+        _SCHEDULER.start()
+
+def _worker():
+    last_depth_log = 0.0
+    while True:
+        close_old_connections()
+        try:
+            jobs = claim_due()
+            if jobs:
+                run_jobs(jobs)
+            if time.time() - last_depth_log >= DEPTH_LOG_SECONDS:
+                last_depth_log = time.time()
+                depth = queue_depth()
+                if depth["pending"]:
+                    print(f"[credit:queue] {depth}")
+        except Exception as e:
+            print(f"[credit:error] worker loop err={e}")
+            jobs = None
+        finally:
+            close_old_connections()
+        if not jobs:
+            _WAKE.wait(POLL_SECONDS)
+            _WAKE.clear()
+
+def claim_due(limit: int = CLAIM_BATCH) -> List[SettlementJob]:
+    """Claim up to `limit` due, unclaimed jobs; they stay hidden for VISIBILITY_SECONDS."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            SettlementJob.objects.select_for_update(skip_locked=True)
+            .filter(due_at__lte=now, attempts__lt=MAX_ATTEMPTS)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lte=now))
+            .order_by("due_at")[:limit]
+        )
+        if jobs:
+            SettlementJob.objects.filter(id__in=[j.id for j in jobs]).update(
+                locked_until=now + timedelta(seconds=VISIBILITY_SECONDS),
+                attempts=F("attempts") + 1,
+            )
+    return jobs
+
+def run_jobs(jobs: List[SettlementJob]):
+    """Credit a claimed batch; on failure record the error and let the claim expire."""
+    try:
+        credit_batch(jobs)
+    except Exception as e:
+        print(f"[credit:error] batch of {len(jobs)} job(s) err={e}")
+        SettlementJob.objects.filter(id__in=[j.id for j in jobs]).update(last_error=str(e)[:500])
+
+def queue_depth() -> Dict[str, int]:
+    """pending = all queued, due = claimable now, dead = out of attempts."""
+    now = timezone.now()
+    jobs = SettlementJob.objects
+    return {
+        "pending": jobs.count(),
+        "due": jobs.filter(due_at__lte=now, attempts__lt=MAX_ATTEMPTS)
+                   .filter(Q(locked_until__isnull=True) | Q(locked_until__lte=now)).count(),
+        "dead": jobs.filter(attempts__gte=MAX_ATTEMPTS).count(),
+    }
+
+
+# ─────────────────────────────────────────────
+# Settlement
+# ─────────────────────────────────────────────
+def credit_batch(jobs: List[SettlementJob]) -> set:
+    """
+    Settle claimed jobs, set-based and in one transaction with their deletion:
+      - Round.winner (if blank) ← selection of the round's earliest due bet
+      - PLACED bets → WON, payout = stake * 2, net = stake
+      - one balance UPDATE per credited user; their profile pushes are coalesced
+    Bets already settled by the engine are skipped (their jobs are dropped).
+    Returns credited user ids.
+    """
+    now_dt = timezone.now()
+    bet_ids = [j.bet_id for j in jobs]
+    print(f"[credit:start] t={now_dt.strftime('%Y-%m-%d %H:%M:%S')}  jobs={len(jobs)}")
+
+    with transaction.atomic():
+        locked = list(
+            Bet.objects.select_for_update()
+            .filter(id__in=bet_ids, status="PLACED")
+            .values_list("id", "round_id", "selection", "user_id", "stake")
+        )
+        first_pick: Dict[int, str] = {}
+        order = {bid: n for n, bid in enumerate(bet_ids)}   # jobs come claimed in due order
+        for _, round_pk, selection, _, _ in sorted(locked, key=lambda r: order[r[0]]):
+            first_pick.setdefault(round_pk, selection)
+        for round_pk, selection in first_pick.items():
+            Round.objects.filter(id=round_pk, winner__isnull=True).update(
+                winner=selection, ended_at=now_dt
+            )
+
+        credits = []
+        if locked:
+            open_bets = Bet.objects.filter(id__in=[row[0] for row in locked])
+            open_bets.update(
+                status="WON",
+                payout=F("stake") * PAYOUT_MULTIPLIER,
+                net=F("stake") * (PAYOUT_MULTIPLIER - 1),
+                settled_at=now_dt,
+            )
+            credits = list(open_bets.values("user_id").annotate(total=Sum("payout")))
+            for row in credits:
+                User.objects.filter(id=row["user_id"]).update(balance=F("balance") + row["total"])
+
+        SettlementJob.objects.filter(id__in=[j.id for j in jobs]).delete()
+
+    exposure.settled((bid, rpk, uid, sel, stake) for bid, rpk, sel, uid, stake in locked)
+    uids = {row["user_id"] for row in credits}
+    mark_profiles_dirty(uids)
+    print(
+        f"[credit:done ] t={timezone.now().strftime('%Y-%m-%d %H:%M:%S')}  "
+        f"bets={len(locked)} skipped={len(jobs) - len(locked)} users={len(uids)}"
+    )
+    return uids
+
+
+# ─────────────────────────────────────────────
+# Dead jobs (out of attempts)
+# ─────────────────────────────────────────────
+def refund_jobs(jobs) -> int:
+    """
+    Cancel and refund the still-PLACED bets of `jobs` (a SettlementJob
+    queryset), then delete the jobs. Returns the number of bets refunded.
+    """
+    bet_ids = list(jobs.values_list("bet_id", flat=True))
+    if not bet_ids:
+        return 0
+    bets = Bet.objects.filter(id__in=bet_ids)
+    refunded = bets.filter(status="PLACED").count()
+    users = bulk_refund_bets(bets)  # bets settled meanwhile are left as they are
+    SettlementJob.objects.filter(bet_id__in=bet_ids).delete()
+    mark_profiles_dirty(users)
+    return refunded
+
+def release_dead_jobs() -> int:
+    """
+    Leader, at start: refund the bets whose jobs ran out of attempts, so
+    their stakes don't stay held forever. The recovery sweep skips bets
+    that have a job, so nothing else would ever resolve them.
+    """
+    refunded = refund_jobs(SettlementJob.objects.filter(attempts__gte=MAX_ATTEMPTS))
+    if refunded:
+        print(f"[credit:dead ] refunded {refunded} bet(s) whose job ran out of attempts")
+    return refunded
@@ -0,0 +1,89 @@
+# backend/bets/streams.py
+"""
+Server-Sent Events feed of round changes (views.round_stream), for clients
+whose proxies drop WebSockets.
+
+Engine events fire on the scheduler thread; SSE responses are coroutines
+on daphne's event loop. The engine listener renders each event once into an
+SSE frame and hands it to every loop that has open streams with a single
+call_soon_threadsafe; that loop then drops it into its streams' queues.
+Between events an open stream is just a parked coroutine (plus a comment
+line every KEEPALIVE_SECONDS so proxies don't time it out).
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Dict, Set
+
+from .engine import encode_round_update, round_payload, subscribe
+
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 1000           # EventSource reconnect delay sent to clients
+KEEPALIVE = b": keepalive\n\n"
+
+# event loop -> table_id -> open stream queues (only touched on that loop)
+_STREAMS: Dict[asyncio.AbstractEventLoop, Dict[str, Set[asyncio.Queue]]] = {}
+_LOCK = threading.Lock()  # guards _STREAMS' keys (the loops) for the engine thread
+
+
+def frame(data: dict, event_id: str = "") -> bytes:
+    """One SSE message carrying a round_update payload."""
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: round_update\ndata: {encode_round_update(data)}\n\n".encode()
+
+
+def open_stream(table_id: str) -> asyncio.Queue:
+    """Register a stream on the running loop; it receives the table's frames."""
+    _listen()
+    loop = asyncio.get_running_loop()
+    q: asyncio.Queue = asyncio.Queue(maxsize=8)
+    with _LOCK:
+        _STREAMS.setdefault(loop, {}).setdefault(table_id, set()).add(q)
+    return q
+
+
+def close_stream(table_id: str, q: asyncio.Queue):
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        tables = _STREAMS.get(loop, {})
+        tables.get(table_id, set()).discard(q)
+        if not tables.get(table_id):
+            tables.pop(table_id, None)
+        if not tables:
+            _STREAMS.pop(loop, None)
+
+
+_LISTENING = False
+
+def _listen():
+    global _LISTENING
+    with _LOCK:
+        if not _LISTENING:
+            subscribe(_on_round_event)
+            _LISTENING = True
+
+
+def _on_round_event(event: dict):
+    """Engine listener: same events and payload as the rounds_<id> WS group."""
+    if event["kind"] == "round_end":
+        return  # step 6 carried the result; round_start follows at once
+    with _LOCK:
+        loops = [loop for loop, tables in _STREAMS.items() if event["table_id"] in tables]
+    if not loops:
+        return
+    data = round_payload(event["round"], event["at"])
+    data["event"] = event["kind"]
+    msg = frame(data, f"{event['round_id']}-{event['reveal_step']}")
+    for loop in loops:
+        try:
+            loop.call_soon_threadsafe(_fan_out, loop, event["table_id"], msg)
+        except RuntimeError:
+            pass  # loop closed under us; its streams are gone
+
+
+def _fan_out(loop: asyncio.AbstractEventLoop, table_id: str, msg: bytes):
+    for q in list(_STREAMS.get(loop, {}).get(table_id, ())):
+        if q.full():
+            q.get_nowait()  # a stalled client only needs the latest state
+        q.put_nowait(msg)
@@ -24,10 +24,14 @@ urlpatterns = [
     # Final URLs:
     #   /api/bets/profile/
     #   /api/bets/current-round/
+    #   /api/bets/round-stream/     (SSE)
     #   /api/bets/place-bet/
     #   /api/bets/feed/last-ten/
+    #   /api/bets/liability/        (admin)
     path("profile/", views.profile, name="profile"),
     path("current-round/", views.current_round, name="current-round"),
+    path("round-stream/", views.round_stream, name="round-stream"),
     path("place-bet/", views.place_bet, name="place-bet"),
     path("feed/last-ten/", views.last_ten_feed, name="last-ten-feed"),
+    path("liability/", views.live_liability, name="live-liability"),
 ]
@@ -27,6 +27,8 @@ from channels.db import database_sync_to_async
 
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from users import session_cache
+
 # 4) Get the WSGI/HTTP app
 django_asgi_app = get_asgi_application()
 User = get_user_model()
@@ -77,19 +79,17 @@ class SimpleJWTAuthMiddleware:
 def _get_user_if_sid_matches(validated_token):
     """
     Return the authenticated user only if the token's 'sid' matches the
-    user's current session_key (enforces one-device policy for WS too).
+    user's current session_key (enforces one-device policy for WS too) and
+    the account is active, like SessionBoundJWTAuthentication for REST.
     """
     uid = validated_token.get("user_id") or validated_token.get("sub")
     sid = validated_token.get("sid")
     if not uid or not sid:
         return AnonymousUser()
 
-    try:
-        user = User.objects.get(id=uid)
-    except User.DoesNotExist:
-        return AnonymousUser()
-
-    if str(user.session_key) != str(sid):
+    # cached session fields (users.session_cache): usually no query
+    user = session_cache.session_user(uid, sid)
+    if user is None or not user.is_active:
         return AnonymousUser()
 
     return user
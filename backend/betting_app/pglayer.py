@@ -0,0 +1,328 @@
+# backend/betting_app/pglayer.py
+"""
+Channel layer on Postgres LISTEN/NOTIFY, so several daphne processes share
+groups (user_<id>, rounds_<table>) without a Redis.
+
+    CHANNEL_LAYERS = {"default": {
+        "BACKEND": "betting_app.pglayer.PostgresChannelLayer",
+        "CONFIG": {"database": "default"},      # a DATABASES alias
+    }}
+
+How it works, per process:
+  - Channels created here are "<prefix>.<client_id>!<random>", so a sender
+    knows which process owns a channel. Each process LISTENs on its own
+    NOTIFY channel (direct sends) and on one shared channel (group sends).
+  - Group membership stays local to the process holding the sockets.
+    group_send delivers to local members at once and publishes the message
+    once on the shared channel; every other process hands it to its own
+    members of that group (or drops it).
+  - Outgoing messages go through one sender thread. Whatever accumulates in
+    BATCH_SECONDS is packed into as few NOTIFY payloads as fit MAX_PAYLOAD
+    and sent in one transaction. A single message larger than that is
+    stored in the overflow table (OVERFLOW_TABLE, created by the bets
+    migration 0015_channel_layer_overflow) and the NOTIFY carries only its id.
+  - One listener thread per process owns a dedicated connection, reads
+    notifications and drops messages into the consumers' inboxes on their
+    event loop.
+
+Delivery is at most once, like the other layers: a process that is
+reconnecting its listener misses what was sent meanwhile.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import queue
+import random
+import select
+import string
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import psycopg2
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+MAX_PAYLOAD = 7900          # bytes; Postgres rejects NOTIFY payloads of 8000+
+BATCH_SECONDS = 0.002       # sender gathers messages this long before a flush
+OVERFLOW_TTL_SECONDS = 60   # overflow rows older than this are deleted
+RECONNECT_SECONDS = 1.0
+OVERFLOW_TABLE = "chl_overflow"  # see bets/migrations/0015_channel_layer_overflow.py
+
+
+class _Inbox:
+    """Messages waiting for one channel, bound to the loop that receives them."""
+    __slots__ = ("queue", "loop", "touched", "waiting")
+
+    def __init__(self, capacity: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=capacity)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.touched = time.monotonic()
+        self.waiting = 0
+
+
+class PostgresChannelLayer(BaseChannelLayer):
+    extensions = ["groups", "flush"]
+
+    def __init__(self, database: str = "default", prefix: str = "chl", expiry: int = 60,
+                 group_expiry: int = 86400, capacity: int = 100, channel_capacity=None, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(channel_capacity or {})
+        self.database = database
+        self.prefix = prefix
+        self.client_id = uuid.uuid4().hex[:12]
+        self.own_pg_channel = f"{prefix}_{self.client_id}"
+        self.shared_pg_channel = f"{prefix}_groups"
+        self.overflow_table = OVERFLOW_TABLE
+
+        self._lock = threading.Lock()
+        self._inboxes: Dict[str, _Inbox] = {}
+        self._groups: Dict[str, Set[str]] = defaultdict(set)
+        self._outbox: "queue.Queue[Tuple[str, dict]]" = queue.Queue()
+        self._started = False
+
+    # ─────────────────────────────────────────
+    # Channel layer API
+    # ─────────────────────────────────────────
+    async def new_channel(self, prefix: str = "specific") -> str:
+        suffix = "".join(random.choice(string.ascii_letters) for _ in range(12))
+        return f"{prefix}.{self.client_id}!{suffix}"
+
+    async def send(self, channel: str, message: dict):
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        assert "__asgi_channel__" not in message
+        owner = self._owner(channel)
+        if owner == self.client_id:
+            self._deliver(channel, message, raise_full=True)
+        else:
+            self._publish(f"{self.prefix}_{owner}" if owner else self.shared_pg_channel,
+                          {"c": channel, "m": message})
+
+    async def receive(self, channel: str) -> dict:
+        assert self.valid_channel_name(channel)
+        self._start()
+        inbox = self._inbox(channel)
+        inbox.loop = asyncio.get_running_loop()
+        inbox.waiting += 1
+        try:
+            return await inbox.queue.get()
+        finally:
+            inbox.waiting -= 1
+            inbox.touched = time.monotonic()
+
+    async def group_add(self, group: str, channel: str):
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        self._start()
+        with self._lock:
+            self._groups[group].add(channel)
+
+    async def group_discard(self, group: str, channel: str):
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        with self._lock:
+            members = self._groups.get(group)
+            if members is not None:
+                members.discard(channel)
+                if not members:
+                    del self._groups[group]
+
+    async def group_send(self, group: str, message: dict):
+        assert isinstance(message, dict), "Message is not a dict"
+        assert self.valid_group_name(group), "Group name not valid"
+        self._deliver_group(group, message)
+        self._publish(self.shared_pg_channel, {"o": self.client_id, "g": group, "m": message})
+
+    async def flush(self):
+        with self._lock:
+            self._inboxes.clear()
+            self._groups.clear()
+
+    # ─────────────────────────────────────────
+    # Local delivery
+    # ─────────────────────────────────────────
+    def _owner(self, channel: str) -> Optional[str]:
+        """client_id of the process holding a specific channel, None if not specific."""
+        if "!" not in channel:
+            return None
+        return channel.split("!", 1)[0].rsplit(".", 1)[-1]
+
+    def _inbox(self, channel: str) -> _Inbox:
+        with self._lock:
+            inbox = self._inboxes.get(channel)
+            if inbox is None:
+                inbox = self._inboxes[channel] = _Inbox(self.get_capacity(channel))
+            return inbox
+
+    def _deliver(self, channel: str, message: dict, raise_full: bool = False):
+        inbox = self._inbox(channel)
+        if inbox.queue.full():
+            if raise_full:
+                raise ChannelFull(channel)
+            return  # group sends skip full channels, like the other layers
+        loop = inbox.loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is None or loop is running:
+            inbox.queue.put_nowait(message)   # no receiver yet, or already on its loop
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._put, inbox, message)
+
+    @staticmethod
+    def _put(inbox: _Inbox, message: dict):
+        if not inbox.queue.full():
+            inbox.queue.put_nowait(message)
+
+    def _deliver_group(self, group: str, message: dict):
+        with self._lock:
+            members = list(self._groups.get(group, ()))
+        for channel in members:
+            self._deliver(channel, message)
+
+    def _expire(self):
+        """Drop idle inboxes: no receiver, no group, nothing read for `expiry` seconds."""
+        cutoff = time.monotonic() - self.expiry
+        with self._lock:
+            members = set().union(*self._groups.values()) if self._groups else set()
+            for channel, inbox in list(self._inboxes.items()):
+                if not inbox.waiting and channel not in members and inbox.touched < cutoff:
+                    del self._inboxes[channel]
+
+    # ─────────────────────────────────────────
+    # Postgres side
+    # ─────────────────────────────────────────
+    def _publish(self, pg_channel: str, envelope: dict):
+        self._start()
+        self._outbox.put((pg_channel, envelope))
+
+    def _start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._sender, name="pglayer-sender", daemon=True).start()
+        threading.Thread(target=self._listener, name="pglayer-listener", daemon=True).start()
+
+    def _connect(self, autocommit: bool):
+        db = settings.DATABASES[self.database]
+        conn = psycopg2.connect(
+            dbname=db.get("NAME"), user=db.get("USER"), password=db.get("PASSWORD"),
+            host=db.get("HOST") or None, port=db.get("PORT") or None,
+            application_name=f"pglayer-{self.client_id}",
+        )
+        conn.autocommit = autocommit
+        return conn
+
+    def _sender(self):
+        conn = None
+        last_sweep = 0.0
+        while True:
+            batch = [self._outbox.get()]
+            deadline = time.monotonic() + BATCH_SECONDS
+            while True:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(self._outbox.get(timeout=left))
+                except queue.Empty:
+                    break
+            try:
+                if conn is None or conn.closed:
+                    conn = self._connect(autocommit=False)
+                with conn, conn.cursor() as cur:
+                    self._flush(cur, batch)
+                    if time.monotonic() - last_sweep > OVERFLOW_TTL_SECONDS / 2:
+                        last_sweep = time.monotonic()
+                        cur.execute(
+                            f"DELETE FROM {self.overflow_table} WHERE created_at < now() - %s * interval '1 second'",
+                            [OVERFLOW_TTL_SECONDS],
+                        )
+                        self._expire()
+            except Exception as e:
+                print(f"[pglayer] dropped {len(batch)} message(s): {e}")
+                try:
+                    conn and conn.close()
+                except Exception:
+                    pass
+                conn = None
+                time.sleep(RECONNECT_SECONDS)
+
+    def _flush(self, cur, batch: List[Tuple[str, dict]]):
+        """Pack a batch per NOTIFY channel into payloads of at most MAX_PAYLOAD bytes."""
+        by_channel: Dict[str, List[str]] = defaultdict(list)
+        for pg_channel, envelope in batch:
+            encoded = json.dumps(envelope, cls=DjangoJSONEncoder, separators=(",", ":"))
+            if len(encoded.encode()) + 2 > MAX_PAYLOAD:
+                cur.execute(f"INSERT INTO {self.overflow_table} (payload) VALUES (%s) RETURNING id", [encoded])
+                encoded = json.dumps({"r": cur.fetchone()[0]})
+            by_channel[pg_channel].append(encoded)
+
+        notifies: List[Tuple[str, str]] = []
+        for pg_channel, items in by_channel.items():
+            chunk, size = [], 2
+            for item in items:
+                n = len(item.encode()) + 1
+                if chunk and size + n > MAX_PAYLOAD:
+                    notifies.append((pg_channel, "[" + ",".join(chunk) + "]"))
+                    chunk, size = [], 2
+                chunk.append(item)
+                size += n
+            notifies.append((pg_channel, "[" + ",".join(chunk) + "]"))
+
+        cur.execute(
+            "SELECT " + ", ".join(["pg_notify(%s, %s)"] * len(notifies)),
+            [arg for pair in notifies for arg in pair],
+        )
+
+    def _listener(self):
+        while True:
+            conn = None
+            try:
+                conn = self._connect(autocommit=True)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.shared_pg_channel}; LISTEN {self.own_pg_channel}")
+                while True:
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    notifies, conn.notifies[:] = list(conn.notifies), []
+                    if notifies:
+                        self._dispatch(conn, notifies)
+            except Exception as e:
+                print(f"[pglayer] listener reconnecting: {e}")
+                time.sleep(RECONNECT_SECONDS)
+            finally:
+                try:
+                    conn and conn.close()  # don't leave a backend behind per reconnect
+                except Exception:
+                    pass
+
+    def _dispatch(self, conn, notifies):
+        envelopes = [env for n in notifies for env in json.loads(n.payload)]
+        refs = [env["r"] for env in envelopes if "r" in env]
+        if refs:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT id, payload FROM {self.overflow_table} WHERE id = ANY(%s)", [refs])
+                stored = {rid: json.loads(payload) for rid, payload in cur.fetchall()}
+            envelopes = [stored.get(env["r"]) if "r" in env else env for env in envelopes]
+
+        for env in envelopes:
+            if env is None:
+                continue  # overflow row already swept
+            if "g" in env:
+                if env.get("o") != self.client_id:   # local members already have it
+                    self._deliver_group(env["g"], env["m"])
+            else:
+                with self._lock:
+                    known = env["c"] in self._inboxes
+                if known or self._owner(env["c"]) == self.client_id:
+                    self._deliver(env["c"], env["m"])
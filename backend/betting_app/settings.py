@@ -78,13 +78,26 @@ WSGI_APPLICATION = "betting_app.wsgi.application"
 ASGI_APPLICATION = "betting_app.asgi.application"
 
 # ───────────────────────────────────────────────────────────
-# Channels: In-Memory layer (no Redis needed in dev)
+# Channels layer (no Redis needed)
+#   "memory"   (default) in-process only: a single daphne worker
+#   "postgres" LISTEN/NOTIFY on the app database, so group sends reach
+#              sockets held by every daphne process (betting_app/pglayer.py);
+#              set CHANNEL_LAYER=postgres when running several workers
 # ───────────────────────────────────────────────────────────
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+CHANNEL_LAYER = os.getenv("CHANNEL_LAYER", "memory")
+if CHANNEL_LAYER == "postgres":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "betting_app.pglayer.PostgresChannelLayer",
+            "CONFIG": {"database": "default"},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        }
     }
-}
 
 # ───────────────────────────────────────────────────────────
 # Database
@@ -137,6 +150,14 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
 
+# Token auth checks session_key/is_active from a per-process cache
+# (users/session_cache.py), invalidated on login/password/admin edits.
+USER_SESSION_CACHE_SECONDS = float(os.getenv("USER_SESSION_CACHE_SECONDS", "30"))
+
+# Exposure books (bets/exposure.py) are per process and reload a live
+# round's PLACED bets this often, picking up other workers' bets.
+EXPOSURE_REFRESH_SECONDS = float(os.getenv("EXPOSURE_REFRESH_SECONDS", "1"))
+
 # ───────────────────────────────────────────────────────────
 # CORS / CSRF for dev
 # ───────────────────────────────────────────────────────────
@@ -157,6 +178,7 @@ CORS_ALLOW_HEADERS = (
     else ["authorization", "content-type", "accept", "origin", "x-requested-with"]
 )
 CORS_ALLOW_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+CORS_EXPOSE_HEADERS = ["ETag", "X-Server-Time"]  # read by the /current-round/ poller
 
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",
@@ -186,3 +208,28 @@ CELERY_RESULT_BACKEND = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+
+# ───────────────────────────────────────────────────────────
+# Teen Patti engine
+# ───────────────────────────────────────────────────────────
+# Card format in Round rows and round payloads:
+#   "label" ("Q of Diamonds", default) | "code" ("QD") | "int" (0–51)
+# The frontend decodes all three (src/utils/cards.js).
+TEENPATTI_CARD_ENCODING = os.getenv("TEENPATTI_CARD_ENCODING", "label")
+
+# Table ids run in parallel by the engine (comma-separated, e.g. "1,2,3").
+# Round start times are staggered evenly across the 30s cycle.
+TEENPATTI_TABLES = os.getenv("TEENPATTI_TABLES", "1").split(",")
+
+# How rounds are produced:
+#   "engine"  (default) the leader deals randomly and publishes via TableState
+#   "derived" every worker computes round k of a table as HMAC(secret, table:k),
+#             so reads need no lock or shared store (see engine.derive_round_state)
+TEENPATTI_ROUND_MODE = os.getenv("TEENPATTI_ROUND_MODE", "engine")
+# Keep this private and stable across workers: it determines every card dealt.
+# Required in derived mode; deliberately not defaulted to SECRET_KEY.
+TEENPATTI_ROUND_SECRET = os.getenv("TEENPATTI_ROUND_SECRET", "")
+
+# Settlement worker threads per serving process (they claim SettlementJob rows
+# with SKIP LOCKED, so adding workers or processes scales credit throughput).
+TEENPATTI_SETTLEMENT_WORKERS = int(os.getenv("TEENPATTI_SETTLEMENT_WORKERS", "1"))
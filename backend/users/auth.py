@@ -1,7 +1,11 @@
 # backend/users/auth.py
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from . import session_cache
 
 
 class OneDeviceTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -21,11 +25,26 @@ class SessionBoundJWTAuthentication(JWTAuthentication):
     """
     Rejects any token whose 'sid' doesn't match the user's current session_key.
     This makes older devices' tokens immediately invalid after a new login.
+    The check is served from users.session_cache (no query while cached).
     """
     def get_user(self, validated_token):
-        user = super().get_user(validated_token)
-        sid = validated_token.get("sid")
-        if not sid or str(user.session_key) != str(sid):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # needs the password hash: plain lookup, then the sid check
+            user = super().get_user(validated_token)
+            if str(user.session_key) != str(validated_token.get("sid")):
+                raise AuthenticationFailed("Session expired", code="session_invalid")
+            return user
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if session_cache.session_info(user_id) is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        user = session_cache.session_user(user_id, validated_token.get("sid"))
+        if user is None:
             # Simple, consistent error text/code for frontend to detect
             raise AuthenticationFailed("Session expired", code="session_invalid")
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
         return user
@@ -138,3 +138,11 @@ class User(AbstractUser, MPTTModel):
         if not self.chip_code:
             self._ensure_chip_code()
         super().save(*args, **kwargs)
+
+    def refresh_from_db(self, using=None, fields=None):
+        # token auth hands out users with only the session fields loaded
+        # (users.session_cache); the first other field touched loads them all
+        if fields is not None and getattr(self, "_session_stub", False):
+            self._session_stub = False
+            fields = set(fields) | self.get_deferred_fields()
+        super().refresh_from_db(using=using, fields=fields)
@@ -0,0 +1,138 @@
+# backend/users/session_cache.py
+"""
+Process-local cache of what token auth checks on every request/WS connect:
+
+    user_id -> (session_key, is_active, is_superuser)
+
+so SessionBoundJWTAuthentication and the WS middleware compare the token's
+'sid' without a User query. Entries live TTL_SECONDS at most; anything
+that changes them (login_view rotating session_key, password changes,
+admin edits) calls invalidate(), which drops the entry here and, on
+Postgres, NOTIFYs every other process to drop it too.
+
+session_user() returns a User built from the cached fields only; the first
+access to any other field (balance, username, ...) loads the rest of the row
+in one query (see User.refresh_from_db).
+"""
+from __future__ import annotations
+
+import select
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+
+from .models import User
+
+TTL_SECONDS = float(getattr(settings, "USER_SESSION_CACHE_SECONDS", 30))
+NOTIFY_CHANNEL = "user_session"
+_FIELDS = ("id", "session_key", "is_active", "is_superuser")
+
+_CACHE: Dict[int, Tuple[float, str, bool, bool]] = {}
+_LOCK = threading.Lock()
+_EPOCH = 0          # bumped by every invalidation, so a load racing one isn't cached
+_LISTENING = False
+
+
+def session_info(user_id) -> Optional[Tuple[str, bool, bool]]:
+    """(session_key, is_active, is_superuser) of a user, or None if there is no such user."""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    _listen()
+    now = time.monotonic()
+    cached = _CACHE.get(user_id)
+    if cached and cached[0] > now:
+        return cached[1:]
+    epoch = _EPOCH
+    row = User.objects.filter(pk=user_id).values_list(*_FIELDS[1:]).first()
+    if row is None:
+        return None
+    info = (str(row[0]), row[1], row[2])
+    with _LOCK:
+        if epoch == _EPOCH:
+            _CACHE[user_id] = (now + TTL_SECONDS, *info)
+    return info
+
+
+def session_user(user_id, sid) -> Optional[User]:
+    """
+    The user if `sid` is their current session_key, else None (unknown user
+    or stale token). Inactive users are returned; callers decide.
+    """
+    info = session_info(user_id)
+    if info is None or not sid or info[0] != str(sid):
+        return None
+    loaded = dict(zip(_FIELDS, (int(user_id), uuid.UUID(info[0]), info[1], info[2])))
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in loaded]
+    user = User.from_db(DEFAULT_DB_ALIAS, names, [loaded[n] for n in names])
+    user._session_stub = True
+    return user
+
+
+def invalidate(user_id):
+    """
+    Forget a user's cached session fields in every process. Inside a
+    transaction the other processes hear about it when it commits.
+    """
+    user_id = int(user_id)
+    _forget({user_id})
+    # again once committed: this process may re-cache the old row meanwhile
+    transaction.on_commit(lambda: _forget({user_id}))
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cur:
+            cur.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, str(user_id)])
+
+
+def _forget(user_ids):
+    global _EPOCH
+    with _LOCK:
+        _EPOCH += 1
+        for user_id in user_ids:
+            _CACHE.pop(user_id, None)
+
+
+# ─────────────────────────────────────────────
+# Cross-process invalidation (Postgres LISTEN)
+# ─────────────────────────────────────────────
+def _listen():
+    global _LISTENING
+    if _LISTENING or connection.vendor != "postgresql":
+        return
+    with _LOCK:
+        if _LISTENING:
+            return
+        _LISTENING = True
+    threading.Thread(target=_listener, name="session-cache-listener", daemon=True).start()
+
+
+def _listener():
+    while True:
+        conn = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            conn.ensure_connection()
+            raw = conn.connection
+            raw.autocommit = True
+            with raw.cursor() as cur:
+                cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            # anything sent while we weren't listening is lost: start clean
+            _forget(list(_CACHE))
+            while True:
+                if select.select([raw], [], [], 5.0) == ([], [], []):
+                    continue
+                raw.poll()
+                ids = {int(n.payload) for n in raw.notifies if n.payload.isdigit()}
+                raw.notifies.clear()
+                _forget(ids)
+        except Exception as e:
+            print(f"[session-cache] listener reconnecting: {e}")
+            time.sleep(1.0)
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
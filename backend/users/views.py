@@ -20,6 +20,7 @@ import uuid
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+from . import session_cache
 from .auth import OneDeviceTokenObtainPairSerializer
 
 User = get_user_model()
@@ -92,6 +93,7 @@ def login_view(request):
     # (1) Rotate session_key -> all old tokens/devices become stale
     user.session_key = uuid.uuid4()
     user.save(update_fields=["session_key"])
+    session_cache.invalidate(user.id)
 
     # (2) Ask any connected clients to logout immediately
     channel_layer = get_channel_layer()
@@ -124,6 +126,7 @@ class ChangePasswordView(APIView):
 
         user.set_password(new_password)
         user.save()
+        session_cache.invalidate(user.id)
         return Response({"detail": "Password changed successfully"}, status=status.HTTP_200_OK)
 
 
@@ -155,6 +158,16 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
 
+    # admin edits may flip is_active / is_superuser: drop cached session fields
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        session_cache.invalidate(serializer.instance.id)
+
+    def perform_destroy(self, instance):
+        user_id = instance.id
+        super().perform_destroy(instance)
+        session_cache.invalidate(user_id)
+
     @action(detail=False, methods=["get"])
     def me(self, request):
         """Return current user profile"""
@@ -283,6 +296,7 @@ class UserViewSet(viewsets.ModelViewSet):
         new_password = generate_random_password()
         user.set_password(new_password)
         user.save()
+        session_cache.invalidate(user.id)
         return Response({"message": "Password reset successfully", "new_password": new_password})
 
     # Edit username
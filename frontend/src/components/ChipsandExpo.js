@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { Box, Typography } from "@mui/material";
 import api from "../services/api"; // axios with baseURL="/api"
+import { subscribeProfile } from "../hooks/useUserWebSocket";
 
 /**
  * Toggle this to re-enable the API later.
@@ -18,56 +19,6 @@ const MOCK_IS_ADMIN =
 
 const MOCK_BALANCE = process.env.REACT_APP_MOCK_BALANCE ?? "0.00";
 
-// Ensure WS goes to backend, not the React dev server
-// Override with REACT_APP_WS_ORIGIN="wss://your-domain.com" (no trailing slash)
-const WS_ORIGIN = process.env.REACT_APP_WS_ORIGIN || "ws://localhost:8000";
-
-// ---------- JWT helpers (refresh + decode) ----------
-function decodeJwtExp(jwt) {
-  try {
-    const payload = JSON.parse(atob(jwt.split(".")[1]));
-    return typeof payload.exp === "number" ? payload.exp : 0; // seconds
-  } catch {
-    return 0;
-  }
-}
-
-async function refreshAccessIfNeeded() {
-  // read tokens from either sessionStorage or localStorage
-  let access =
-    sessionStorage.getItem("access") ||
-    sessionStorage.getItem("access_token") ||
-    localStorage.getItem("access") ||
-    localStorage.getItem("access_token");
-
-  const nowSec = Math.floor(Date.now() / 1000);
-  const exp = access ? decodeJwtExp(access) : 0;
-
-  // if no access or expires within 30s, try refreshing
-  if (!access || exp - nowSec < 30) {
-    const refresh =
-      sessionStorage.getItem("refresh") || localStorage.getItem("refresh");
-    if (!refresh) return null;
-
-    const res = await fetch("/api/token/refresh/", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ refresh }),
-    });
-    if (!res.ok) return null;
-    const data = await res.json();
-    access = data.access;
-    if (access) {
-      // store back (mirror your app’s convention)
-      sessionStorage.setItem("access", access);
-      sessionStorage.setItem("access_token", access);
-      // optional: keep refresh fresh if backend rotates it
-      if (data.refresh) sessionStorage.setItem("refresh", data.refresh);
-    }
-  }
-  return access || null;
-}
-
 // INR formatter
 const formatINR = (val) => {
   if (val === null || val === undefined) return "0.00";
@@ -82,7 +33,7 @@ const formatINR = (val) => {
 /**
  * Slim Chips & Expo bar (no emojis)
  * - If DISABLE_PROFILE is true, it uses mock values and NEVER calls /api/bets/profile/
- * - If DISABLE_PROFILE is false, it opens a WebSocket to /ws/profile/?token=...
+ * - If DISABLE_PROFILE is false, it listens on the shared /ws/profile/ socket
  * - Admins display ∞
  */
 const ChipsAndExpo = ({ expo = 0 }) => {
@@ -120,69 +71,24 @@ const ChipsAndExpo = ({ expo = 0 }) => {
   };
 
   useEffect(() => {
-    let ws;
-    let closed = false;
-
-    async function connect() {
-      if (DISABLE_PROFILE) {
-        applyMock();
-        return;
-      }
-
-      const access = await refreshAccessIfNeeded();
-      if (!access) {
-        // fallback once to REST if you want
-        await fetchProfile();
-        return;
-      }
-
-      const url = `${WS_ORIGIN}/ws/profile/?token=${access}`;
-      ws = new WebSocket(url);
-
-      ws.onmessage = (evt) => {
-        try {
-          const msg = JSON.parse(evt.data);
-          // All server pushes include a type now
-          if (msg.type === "profile_update") {
-            if (typeof msg.is_admin === "boolean") setIsAdmin(msg.is_admin);
-            else setIsAdmin(false);
-
-            if (msg.balance !== undefined) setBalance(msg.balance);
-            // If you want expo from WS instead of prop:
-            // if (msg.expo !== undefined) setExpoState(msg.expo);
-          } else if (msg.type === "force_logout") {
-            // Optional: handle server-initiated logout UX
-            // e.g., show toast then redirect
-          }
-        } catch {
-          // ignore malformed messages
-        }
-      };
-
-      ws.onerror = () => {
-        // optional: one-shot REST fallback
-        fetchProfile();
-      };
-
-      ws.onclose = async (ev) => {
-        if (closed) return;
-        // For auth-close (4401/4403), don't hammer retries
-        if (ev && (ev.code === 4401 || ev.code === 4403)) {
-          return;
-        }
-        await new Promise((r) => setTimeout(r, 1000));
-        connect();
-      };
+    if (DISABLE_PROFILE) {
+      applyMock();
+      return;
     }
-
-    connect();
-
-    return () => {
-      closed = true;
-      try {
-        ws && ws.close();
-      } catch {}
-    };
+    // Rides the tab's shared /ws/profile/ socket (hooks/useUserWebSocket)
+    return subscribeProfile((msg) => {
+      if (msg.type === "profile_update") {
+        if (typeof msg.is_admin === "boolean") setIsAdmin(msg.is_admin);
+        else setIsAdmin(false);
+
+        if (msg.balance !== undefined) setBalance(msg.balance);
+        // If you want expo from WS instead of prop:
+        // if (msg.expo !== undefined) setExpoState(msg.expo);
+      } else if (msg.type === "socket_unavailable") {
+        // not logged in, or the socket failed: one-shot REST fallback
+        fetchProfile();
+      }
+    });
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
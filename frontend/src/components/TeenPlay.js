@@ -19,6 +19,9 @@ import {
 import api from "../services/api";
 import BackToMainMenuButton from "./common_components/BackToMenuBtn";
 import FakeVideoScreen from "./common_components/FakeVideoScreen";
+import useRoundSocket from "../hooks/useRoundSocket";
+import useBetSocket from "../hooks/useBetSocket";
+import { decodeCards } from "../utils/cards";
 
 // keep baseURL = "/api" on your axios instance
 const buildUrl = (path) => {
@@ -220,15 +223,29 @@ function TeenPlay({ setExpo }) {
   const boundaryFetchInFlight = useRef(false);
   const revealFetchInFlight = useRef(false);
   const amountInputRef = useRef(null);
+  // server clock − local clock (s), from pushes' server_time or /current-round/'s X-Server-Time
+  const clockOffsetRef = useRef(0);
 
   useEffect(() => {
     phaseRef.current = phase;
   }, [phase]);
 
+  // Server-pushed ticks (phase changes, reveal steps, results).
+  // While this socket is open the boundary fetches below are skipped.
+  const roundSocketLive = useRoundSocket((msg) => applySnapshot(msg, true));
+
+  // Bets go over /ws/profile/ while it is open (HTTP POST is the fallback)
+  const placeOverSocket = useBetSocket();
+
   /* ---------- helpers to call backend ---------- */
   const getCurrentRound = async () => {
     const url = buildUrl("/current-round/");
     const res = await api.get(url);
+    // the body has no server_time (stable ETag); the header carries it
+    const serverTime = parseFloat(res.headers?.["x-server-time"]);
+    if (!Number.isNaN(serverTime)) {
+      clockOffsetRef.current = serverTime - Date.now() / 1000;
+    }
     return res;
   };
 
@@ -238,28 +255,34 @@ function TeenPlay({ setExpo }) {
     return res;
   };
 
-  // 🔄 Refresh expo AND broadcast global wallet event (chips+expo)
+  // Apply { balance, expo } (a /profile/ body or a bet ack) to this screen
+  // AND broadcast the global wallet event (chips+expo)
+  const applyWallet = (data) => {
+    const expoNum = parseFloat(data.expo || 0);
+    const balanceNum = parseFloat(data.balance || 0);
+
+    // keep screen's expo in sync (used in this screen)
+    if (typeof setExpo === "function") setExpo(expoNum);
+
+    // 🔔 tell the top bar / any listener to update chips & expo
+    window.dispatchEvent(
+      new CustomEvent("wallet:update", {
+        detail: {
+          balance: balanceNum,
+          expo: expoNum,
+          is_admin: !!data.is_admin,
+          raw: data,
+        },
+      })
+    );
+  };
+
+  // 🔄 Refresh expo + chips from /profile/
   const refreshProfile = async () => {
     try {
       const url = buildUrl("/profile/");
       const { data } = await api.get(url);
-      const expoNum = parseFloat(data.expo || 0);
-      const balanceNum = parseFloat(data.balance || 0);
-
-      // keep screen's expo in sync (used in this screen)
-      if (typeof setExpo === "function") setExpo(expoNum);
-
-      // 🔔 tell the top bar / any listener to update chips & expo
-      window.dispatchEvent(
-        new CustomEvent("wallet:update", {
-          detail: {
-            balance: balanceNum,
-            expo: expoNum,
-            is_admin: !!data.is_admin,
-            raw: data,
-          },
-        })
-      );
+      applyWallet(data);
     } catch (e) {
       console.error("[TeenPlay] failed to refresh profile:", e);
     }
@@ -345,6 +368,7 @@ function TeenPlay({ setExpo }) {
 
   /* ---------- phase-change fetches ---------- */
   const triggerRevealStartFetch = async () => {
+    if (roundSocketLive.current) return; // reveal push is on its way
     if (revealFetchInFlight.current) return;
     revealFetchInFlight.current = true;
     try {
@@ -359,6 +383,7 @@ function TeenPlay({ setExpo }) {
   };
 
   const triggerBoundaryFetch = async () => {
+    if (roundSocketLive.current) return; // round_start push is on its way
     if (boundaryFetchInFlight.current) return;
     boundaryFetchInFlight.current = true;
     try {
@@ -389,9 +414,18 @@ function TeenPlay({ setExpo }) {
     }
 
     const nextPhase = data.phase || "bet";
+    if (typeof data.server_time === "number") {
+      clockOffsetRef.current = data.server_time - Date.now() / 1000;
+    }
+    // /current-round/ sends only the absolute phase_ends_at (stable ETag)
     const nextSecs =
       typeof data.seconds_left === "number"
         ? data.seconds_left
+        : typeof data.phase_ends_at === "number"
+        ? Math.max(
+            0,
+            Math.round(data.phase_ends_at - (Date.now() / 1000 + clockOffsetRef.current))
+          )
         : nextPhase === "reveal"
         ? 10
         : 20;
@@ -403,8 +437,9 @@ function TeenPlay({ setExpo }) {
       phase: nextPhase,
       seconds_left: nextSecs,
       result: data.result ?? null,
-      player_a_full: data.player_a_full || null,
-      player_b_full: data.player_b_full || null,
+      // cards may arrive as labels, "QD" codes or 0–51 ints
+      player_a_full: decodeCards(data.player_a_full) || null,
+      player_b_full: decodeCards(data.player_b_full) || null,
     });
 
     setPhase(nextPhase);
@@ -490,10 +525,22 @@ function TeenPlay({ setExpo }) {
         bet_seconds_left: phase === "bet" ? Math.max(0, Math.floor(secondsLeft)) : 0,
       };
 
-      await api.post(url, payload);
-
-      // Pull authoritative values immediately so header shows the deduction now
-      await refreshProfile();
+      const viaSocket = placeOverSocket.current;
+      if (viaSocket) {
+        const ack = await viaSocket(payload).catch((e) => {
+          // refused or no answer: the wallet may or may not have moved
+          refreshProfile();
+          // same shape as an axios error so the handler below works for both
+          throw Object.assign(new Error(e.error), { response: { data: { error: e.error } } });
+        });
+        // the ack carries the balance after the debit and the new expo
+        applyWallet(ack);
+      } else {
+        await api.post(url, payload);
+
+        // Pull authoritative values immediately so header shows the deduction now
+        await refreshProfile();
+      }
 
       // Confirm optimistic row (optional)
       setMatchBets((prev) =>
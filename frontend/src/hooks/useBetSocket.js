@@ -0,0 +1,29 @@
+// src/hooks/useBetSocket.js
+import { useEffect } from "react";
+import {
+  placeBetOverSocket,
+  profileSocketOpen,
+  subscribeProfile,
+} from "./useUserWebSocket";
+
+// .current is read at click time, so it follows the socket's state
+const placeRef = {
+  get current() {
+    return profileSocketOpen() ? placeBetOverSocket : null;
+  },
+};
+
+/**
+ * Places bets over the tab's shared /ws/profile/ socket ("place_bet"
+ * command → "bet_ack"); no socket of its own.
+ * Returns a ref whose .current is a placeBet(payload) function while the
+ * socket is open, or null otherwise (callers fall back to POST /place-bet/).
+ * placeBet resolves with the ack ({ balance, expo, delay_seconds, ... }) and
+ * rejects with { error, status } just like the HTTP error body.
+ */
+export default function useBetSocket() {
+  // keep the shared socket up while the bet panel is mounted
+  useEffect(() => subscribeProfile(() => {}), []);
+
+  return placeRef;
+}
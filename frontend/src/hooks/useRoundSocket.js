@@ -0,0 +1,128 @@
+// src/hooks/useRoundSocket.js
+import { useEffect, useRef } from "react";
+import { getAccess } from "../services/api";
+
+// Ensure WS goes to backend, not the React dev server
+// Override with REACT_APP_WS_ORIGIN="wss://your-domain.com" (no trailing slash)
+const WS_ORIGIN = process.env.REACT_APP_WS_ORIGIN || "ws://localhost:8000";
+// same origin as the REST calls (api baseURL "/api")
+const SSE_URL = "/api/bets/round-stream/";
+// WS attempts that never opened before switching to SSE (proxy drops WS)
+const WS_FAILS_BEFORE_SSE = 2;
+
+/**
+ * Subscribes to /ws/rounds/ (server-pushed round ticks).
+ * If the socket keeps failing to open, switches to the Server-Sent Events
+ * stream, which carries the same "round_update" messages.
+ * The socket mostly sends "round_delta" (changes since seq `base`); they are
+ * applied here onto the last full state, and a gap asks for a "resync".
+ * - onMessage(msg) is called with the full round_update for every push
+ * - returns a ref whose .current is true while the socket/stream is open,
+ *   so callers can skip their HTTP fallback fetches
+ */
+// Rebuild the full round_update from the one it was diffed against
+const applyDelta = (prev, delta) => {
+  const next = { ...prev, ...delta.set, seq: delta.seq };
+  (delta.cards || []).forEach(([player, slot, card]) => {
+    const key = player === "A" ? "player_a_cards" : "player_b_cards";
+    next[key] = [...(next[key] || [])];
+    next[key][slot] = card;
+  });
+  return next;
+};
+
+export default function useRoundSocket(onMessage) {
+  const liveRef = useRef(false);
+  const handlerRef = useRef(onMessage);
+  handlerRef.current = onMessage;
+
+  useEffect(() => {
+    let ws;
+    let es;
+    let closed = false;
+    let retryTimer = null;
+    let failedOpens = 0;
+    let last = null; // last full round_update (base for deltas)
+
+    const onData = (raw) => {
+      try {
+        const msg = JSON.parse(raw);
+        if (msg.type === "round_update") {
+          last = msg;
+          handlerRef.current?.(msg);
+        } else if (msg.type === "round_delta") {
+          if (last && msg.seq <= last.seq) return; // snapshot was already newer
+          if (!last || msg.base !== last.seq) {
+            // missed a tick: ask for a full payload
+            if (ws && ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({ type: "resync" }));
+            return;
+          }
+          last = applyDelta(last, msg);
+          handlerRef.current?.(last);
+        }
+      } catch {
+        // ignore malformed messages
+      }
+    };
+
+    // EventSource reconnects by itself (server sends retry: 1000)
+    const connectSse = (access) => {
+      es = new EventSource(`${SSE_URL}?token=${encodeURIComponent(access)}`);
+      es.onopen = () => {
+        liveRef.current = true;
+      };
+      es.addEventListener("round_update", (evt) => onData(evt.data));
+      es.onerror = () => {
+        liveRef.current = false;
+        if (es.readyState === EventSource.CLOSED) es = null; // e.g. 401 → HTTP fallback
+      };
+    };
+
+    const connect = () => {
+      const access = getAccess();
+      if (!access) return; // not logged in → caller keeps polling fallback
+
+      if (failedOpens >= WS_FAILS_BEFORE_SSE) {
+        connectSse(access);
+        return;
+      }
+
+      let opened = false;
+      last = null; // a new socket starts from its connect snapshot
+      ws = new WebSocket(`${WS_ORIGIN}/ws/rounds/?token=${access}`);
+
+      ws.onopen = () => {
+        opened = true;
+        failedOpens = 0;
+        liveRef.current = true;
+      };
+
+      ws.onmessage = (evt) => onData(evt.data);
+
+      ws.onclose = (ev) => {
+        liveRef.current = false;
+        if (closed) return;
+        // auth-close: don't hammer retries, HTTP fallback takes over
+        if (ev && (ev.code === 4401 || ev.code === 4403)) return;
+        if (!opened) failedOpens += 1;
+        retryTimer = setTimeout(connect, 1000);
+      };
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      liveRef.current = false;
+      if (retryTimer) clearTimeout(retryTimer);
+      try {
+        ws && ws.close();
+      } catch {}
+      try {
+        es && es.close();
+      } catch {}
+    };
+  }, []);
+
+  return liveRef;
+}
@@ -1,47 +1,222 @@
 // src/hooks/useUserWebSocket.js
 import { useEffect, useRef } from "react";
 
-export default function useUserWebSocket() {
-  const wsRef = useRef(null);
-
-  useEffect(() => {
-    const access =
-      sessionStorage.getItem("access") || localStorage.getItem("access");
-    if (!access) return; // not logged in
-
-    const scheme = window.location.protocol === "https:" ? "wss" : "ws";
-    // Adjust path if your Channels route differs
-    const url = `${scheme}://${window.location.host}/ws/profile/?token=${access}`;
-
-    const ws = new WebSocket(url);
-    wsRef.current = ws;
-
-    ws.onmessage = (evt) => {
-      try {
-        const msg = JSON.parse(evt.data);
-
-        if (msg.type === "force_logout") {
-          try {
-            sessionStorage.clear();
-            localStorage.removeItem("access");
-            localStorage.removeItem("refresh");
-          } finally {
-            alert("You were logged out because your account was used on another device.");
-            window.location.assign("/login?reason=other_device");
-          }
-          return;
-        }
-
-        // handle your other messages here (e.g., profile_update)
-        // if (msg.type === "profile_update") { ... }
-      } catch {}
-    };
-
-    return () => {
-      if (wsRef.current) {
-        try { wsRef.current.close(); } catch {}
-        wsRef.current = null;
-      }
-    };
-  }, []);
+/**
+ * The tab's one /ws/profile/ socket, shared by everything that needs it:
+ * App (force_logout), ChipsAndExpo (profile_update) and TeenPlay's bets
+ * (useBetSocket → "place_bet" / "bet_ack"). Every extra socket would join
+ * the user_<id> group again and double each profile push.
+ *
+ * Opens with the first subscriber, reconnects while anyone is subscribed,
+ * and closes when the last one leaves. A subscriber joining an open socket
+ * gets the last profile_update at once.
+ */
+
+// Ensure WS goes to backend, not the React dev server
+// Override with REACT_APP_WS_ORIGIN="wss://your-domain.com" (no trailing slash)
+const WS_ORIGIN = process.env.REACT_APP_WS_ORIGIN || "ws://localhost:8000";
+const ACK_TIMEOUT_MS = 5000;
+
+// ---------- JWT helpers (refresh + decode) ----------
+function decodeJwtExp(jwt) {
+  try {
+    const payload = JSON.parse(atob(jwt.split(".")[1]));
+    return typeof payload.exp === "number" ? payload.exp : 0; // seconds
+  } catch {
+    return 0;
+  }
+}
+
+export async function refreshAccessIfNeeded() {
+  // read tokens from either sessionStorage or localStorage
+  let access =
+    sessionStorage.getItem("access") ||
+    sessionStorage.getItem("access_token") ||
+    localStorage.getItem("access") ||
+    localStorage.getItem("access_token");
+
+  const nowSec = Math.floor(Date.now() / 1000);
+  const exp = access ? decodeJwtExp(access) : 0;
+
+  // if no access or expires within 30s, try refreshing
+  if (!access || exp - nowSec < 30) {
+    const refresh =
+      sessionStorage.getItem("refresh") || localStorage.getItem("refresh");
+    if (!refresh) return null;
+
+    const res = await fetch("/api/token/refresh/", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ refresh }),
+    });
+    if (!res.ok) return null;
+    const data = await res.json();
+    access = data.access;
+    if (access) {
+      // store back (mirror your app’s convention)
+      sessionStorage.setItem("access", access);
+      sessionStorage.setItem("access_token", access);
+      // optional: keep refresh fresh if backend rotates it
+      if (data.refresh) sessionStorage.setItem("refresh", data.refresh);
+    }
+  }
+  return access || null;
+}
+
+// ---------- the shared socket ----------
+const listeners = new Set();
+const waiting = new Map(); // request_id -> { resolve, reject, timer }
+let ws = null;
+let connecting = false;
+let retryTimer = null;
+let lastProfile = null;
+let seq = 0;
+
+const emit = (msg) => {
+  listeners.forEach((fn) => {
+    try {
+      fn(msg);
+    } catch (e) {
+      console.error("[profile-ws] listener failed:", e);
+    }
+  });
+};
+
+const failAll = (error) => {
+  waiting.forEach(({ reject, timer }) => {
+    clearTimeout(timer);
+    reject({ error, status: 0 });
+  });
+  waiting.clear();
+};
+
+const forceLogout = () => {
+  try {
+    sessionStorage.clear();
+    localStorage.removeItem("access");
+    localStorage.removeItem("refresh");
+  } finally {
+    alert("You were logged out because your account was used on another device.");
+    window.location.assign("/login?reason=other_device");
+  }
+};
+
+async function connect() {
+  retryTimer = null;
+  if (ws || connecting || !listeners.size) return;
+  connecting = true;
+  let access = null;
+  try {
+    access = await refreshAccessIfNeeded();
+  } catch {
+    access = null;
+  } finally {
+    connecting = false;
+  }
+  if (ws || !listeners.size) return;
+  if (!access) {
+    emit({ type: "socket_unavailable" }); // not logged in → REST only
+    return;
+  }
+
+  const sock = new WebSocket(`${WS_ORIGIN}/ws/profile/?token=${access}`);
+  ws = sock;
+
+  sock.onmessage = (evt) => {
+    let msg;
+    try {
+      msg = JSON.parse(evt.data);
+    } catch {
+      return; // ignore malformed messages
+    }
+    if (msg.type === "bet_ack") {
+      const entry = waiting.get(msg.request_id);
+      if (!entry) return;
+      waiting.delete(msg.request_id);
+      clearTimeout(entry.timer);
+      if (msg.ok) entry.resolve(msg);
+      else entry.reject({ error: msg.error, status: msg.status });
+      return;
+    }
+    if (msg.type === "force_logout") {
+      forceLogout();
+      return;
+    }
+    if (msg.type === "profile_update") lastProfile = msg;
+    emit(msg);
+  };
+
+  sock.onerror = () => emit({ type: "socket_unavailable" });
+
+  sock.onclose = (ev) => {
+    if (ws === sock) ws = null;
+    lastProfile = null;
+    failAll("Connection lost");
+    if (!listeners.size) return;
+    // For auth-close (4401/4403), don't hammer retries
+    if (ev && (ev.code === 4401 || ev.code === 4403)) return;
+    retryTimer = setTimeout(connect, 1000);
+  };
+}
+
+function disconnect() {
+  if (retryTimer) clearTimeout(retryTimer);
+  retryTimer = null;
+  const sock = ws;
+  ws = null;
+  lastProfile = null;
+  failAll("Connection closed");
+  try {
+    sock && sock.close();
+  } catch {}
+}
+
+/** Listen to the shared socket's messages; returns the unsubscribe function. */
+export function subscribeProfile(listener) {
+  listeners.add(listener);
+  if (lastProfile) listener(lastProfile);
+  if (!ws && !retryTimer) connect();
+  return () => {
+    listeners.delete(listener);
+    if (!listeners.size) disconnect();
+  };
+}
+
+export const profileSocketOpen = () =>
+  !!ws && ws.readyState === WebSocket.OPEN;
+
+/**
+ * Send "place_bet" on the shared socket. Resolves with the ack
+ * ({ balance, expo, delay_seconds, ... }), rejects with { error, status }
+ * just like the HTTP error body.
+ */
+export function placeBetOverSocket(payload) {
+  return new Promise((resolve, reject) => {
+    if (!profileSocketOpen()) {
+      reject({ error: "Connection lost", status: 0 });
+      return;
+    }
+    const request_id = `b${Date.now()}-${++seq}`;
+    const timer = setTimeout(() => {
+      waiting.delete(request_id);
+      reject({ error: "No answer from server", status: 0 });
+    }, ACK_TIMEOUT_MS);
+    waiting.set(request_id, { resolve, reject, timer });
+    ws.send(JSON.stringify({ type: "place_bet", request_id, ...payload }));
+  });
+}
+
+/**
+ * Keep the shared socket open while mounted; `onMessage` (optional) gets
+ * every pushed message (profile_update, socket_unavailable, ...).
+ * force_logout is handled here for the whole app.
+ */
+export default function useUserWebSocket(onMessage) {
+  const handlerRef = useRef(onMessage);
+  handlerRef.current = onMessage;
+
+  useEffect(
+    () => subscribeProfile((msg) => handlerRef.current && handlerRef.current(msg)),
+    []
+  );
 }
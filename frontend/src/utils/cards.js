@@ -0,0 +1,33 @@
+// src/utils/cards.js
+// Single decoder for every card format the backend may send
+// (TEENPATTI_CARD_ENCODING): "Q of Diamonds", "QD" or 41.
+// int code = rankIndex * 4 + suitIndex (ranks 2..A, suits H D C S)
+
+export const FLIPPED = "flipped_card";
+
+const RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"];
+const SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"];
+const RANK_CHARS = "23456789TJQKA";
+const SUIT_CHARS = "HDCS";
+
+/** Any card format → "R of Suit" label; flipped/empty → FLIPPED / "" */
+export const decodeCard = (card) => {
+  if (card === null || card === undefined || card === "") return "";
+  if (card === FLIPPED) return FLIPPED;
+
+  if (typeof card === "number") {
+    if (card < 0 || card > 51) return "";
+    return `${RANKS[Math.floor(card / 4)]} of ${SUITS[card % 4]}`;
+  }
+
+  if (typeof card === "string" && card.length === 2) {
+    const r = RANK_CHARS.indexOf(card[0]);
+    const s = SUIT_CHARS.indexOf(card[1]);
+    if (r >= 0 && s >= 0) return `${RANKS[r]} of ${SUITS[s]}`;
+  }
+
+  return card; // already a label
+};
+
+export const decodeCards = (cards) =>
+  Array.isArray(cards) ? cards.map(decodeCard) : cards ?? null;